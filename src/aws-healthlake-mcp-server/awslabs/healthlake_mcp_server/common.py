@@ -13,16 +13,22 @@
 # limitations under the License.
 
 import functools
+import inspect
 import os
 from botocore.exceptions import ClientError
 from loguru import logger
-from pydantic import BaseModel, Field
-from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Callable, Dict, List, Optional, TypeVar, cast
+
+
+F = TypeVar('F', bound=Callable[..., Any])
 
 
 class Tag(BaseModel):
     """Tag model for HealthLake resources."""
 
+    model_config = ConfigDict(populate_by_name=True, frozen=True)
+
     key: str = Field(alias='Key')
     value: str = Field(alias='Value')
 
@@ -60,28 +66,80 @@ class StartFHIRExportJobInput(BaseModel):
     client_token: Optional[str] = None
 
 
-def handle_exceptions(func):
-    """Decorator to handle exceptions in HealthLake MCP server functions."""
+def tags_to_aws(tags: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Convert tags to the AWS `{'Key': ..., 'Value': ...}` format.
+
+    Accepts `Key`/`Value` or `key`/`value` entries without building a `Tag` model per tag.
+    """
+    aws_tags = []
+    for tag in tags:
+        key = tag['Key'] if 'Key' in tag else tag.get('key')
+        value = tag['Value'] if 'Value' in tag else tag.get('value')
+        if key is None or value is None:
+            raise ValueError(f'Invalid tag {tag!r}: expected Key and Value')
+        aws_tags.append({'Key': key, 'Value': value})
+    return aws_tags
+
+
+def _client_error_to_exception(e: ClientError) -> Exception:
+    """Log an AWS ClientError and convert it into a HealthLake error with more context."""
+    error_code = e.response.get('Error', {}).get('Code', 'Unknown')
+    error_message = e.response.get('Error', {}).get('Message', str(e))
+    logger.error('AWS ClientError: {} - {}', error_code, error_message)
+
+    return Exception(f'AWS HealthLake Error ({error_code}): {error_message}')
+
+
+def handle_exceptions(func: F) -> F:
+    """Decorator to handle exceptions in HealthLake MCP server functions.
+
+    Supports both regular and async functions.
+    """
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await func(*args, **kwargs)
+            except ClientError as e:
+                # Re-raise with more context
+                raise _client_error_to_exception(e) from e
+            except Exception as e:
+                logger.error('Error in {}: {}', func.__name__, e)
+                raise
+
+        return cast(F, async_wrapper)
 
     @functools.wraps(func)
-    def wrapper(*args, **kwargs):
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
         try:
             return func(*args, **kwargs)
         except ClientError as e:
-            error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-            error_message = e.response.get('Error', {}).get('Message', str(e))
-            logger.error(f'AWS ClientError: {error_code} - {error_message}')
-
             # Re-raise with more context
-            raise Exception(f'AWS HealthLake Error ({error_code}): {error_message}') from e
+            raise _client_error_to_exception(e) from e
         except Exception as e:
-            logger.error(f'Error in {func.__name__}: {str(e)}')
+            logger.error('Error in {}: {}', func.__name__, e)
             raise
 
-    return wrapper
+    return cast(F, wrapper)
+
+
+def _read_only_from_env() -> bool:
+    """Check whether HEALTHLAKE_MCP_READONLY enables read-only mode."""
+    return os.getenv('HEALTHLAKE_MCP_READONLY', 'false').lower() == 'true'
+
+
+# Read once at import, since the server's environment does not change while it runs
+_read_only = _read_only_from_env()
+
+
+def reload_read_only() -> None:
+    """Read HEALTHLAKE_MCP_READONLY from the environment again."""
+    global _read_only
+    _read_only = _read_only_from_env()
 
 
-def mutation_check():
+def mutation_check() -> None:
     """Check if mutations are allowed based on environment variable."""
-    if os.getenv('HEALTHLAKE_MCP_READONLY', 'false').lower() == 'true':
+    if _read_only:
         raise Exception('Operation not permitted: HealthLake MCP server is in read-only mode')
@@ -14,45 +14,573 @@
 
 #!/usr/bin/env python3
 
+import asyncio
 import boto3
+import copy
+import functools
+import httpx
+import inspect
+import orjson
 import os
-import requests
+import random
+import re
+import threading
+import time
 import uuid
 from awslabs.healthlake_mcp_server.common import (
-    Tag,
     handle_exceptions,
     mutation_check,
+    reload_read_only,
+    tags_to_aws,
 )
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
 from botocore.config import Config
-from datetime import datetime
+from botocore.credentials import ReadOnlyCredentials
+from botocore.exceptions import NoCredentialsError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from loguru import logger
 from mcp.server.fastmcp import FastMCP
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, cast
+from urllib.parse import quote, urlencode
 
 
 # Initialize the MCP server
 mcp = FastMCP('AWS HealthLake MCP Server')
 
+T = TypeVar('T')
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+# Size of the HTTP connection pools used for HealthLake calls
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+# Connect and read timeouts, in seconds, for FHIR REST requests
+FHIR_CONNECT_TIMEOUT_SECONDS = 5.0
+FHIR_READ_TIMEOUT_SECONDS = 60.0
+
+
+def _max_pool_connections() -> int:
+    """Get the HTTP connection pool size from the environment."""
+    return int(os.getenv('HEALTHLAKE_MCP_MAX_POOL', str(DEFAULT_MAX_POOL_CONNECTIONS)))
+
+
+# Worker threads for blocking boto3 calls, sized to the connection pool. asyncio's default
+# executor has min(32, CPU count + 4) threads, which on small hosts caps concurrent AWS
+# calls well below the pool size.
+_executor = ThreadPoolExecutor(
+    max_workers=_max_pool_connections(), thread_name_prefix='healthlake-mcp'
+)
+
+
+# Shared async HTTP client so FHIR requests reuse connections across tool calls.
+# HTTP/2 is negotiated when the endpoint supports it, multiplexing concurrent requests.
+# Every pooled connection is kept alive, so bursts don't pay new TLS handshakes afterwards.
+_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(
+        max_connections=_max_pool_connections(),
+        max_keepalive_connections=_max_pool_connections(),
+    ),
+    timeout=httpx.Timeout(FHIR_READ_TIMEOUT_SECONDS, connect=FHIR_CONNECT_TIMEOUT_SECONDS),
+)
+
+# Maximum number of FHIR requests in flight at once across all tool calls
+DEFAULT_FHIR_CONCURRENCY = 20
+
+# Bounds outbound FHIR requests so bursts of tool calls and their retries cannot
+# flood the datastore with more requests than it can absorb
+_fhir_semaphore = asyncio.Semaphore(
+    int(os.getenv('HEALTHLAKE_MCP_CONCURRENCY', str(DEFAULT_FHIR_CONCURRENCY)))
+)
+
+# Retry settings for FHIR REST requests (decorrelated-jitter exponential backoff)
+FHIR_MAX_ATTEMPTS = 5
+FHIR_BACKOFF_BASE_SECONDS = 1.0
+FHIR_BACKOFF_CAP_SECONDS = 20.0
+
+# Throttling responses are safe to retry for any method; other transient
+# server errors are only retried for idempotent methods
+_THROTTLING_STATUS_CODES = frozenset({429, 503})
+_TRANSIENT_STATUS_CODES = frozenset({500, 502, 504})
+_IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE'})
+
+# Transport errors raised before a request is sent, so any method is safe to retry
+_UNSENT_REQUEST_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# How long, in seconds, a datastore's FHIR endpoint is cached
+DEFAULT_ENDPOINT_CACHE_TTL_SECONDS = 3600
+
+# (region, datastore_id) -> (endpoint, time it was fetched)
+_endpoint_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+# How long, in seconds, a datastore's CapabilityStatement is cached
+DEFAULT_CAPABILITIES_CACHE_TTL_SECONDS = 3600
+
+# (region, datastore_id) -> (CapabilityStatement, time it was fetched)
+_capabilities_cache: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+
+# (region, datastore_id) -> endpoint lookup in progress
+_endpoint_lookups: Dict[Tuple[str, str], asyncio.Future[str]] = {}
+
+# Maximum entries sent in one request when create_fhir_bundle splits a batch bundle
+DEFAULT_BATCH_CHUNK_SIZE = 100
+
+# Upper bound on the pages a list tool fetches when fetch_all is set
+MAX_LIST_PAGES = 100
+
+# How long, in seconds, read-only responses are cached (0 disables the cache)
+DEFAULT_RESPONSE_CACHE_TTL_SECONDS = 0
+
+# Job statuses that are still changing, so describe responses for them are never cached
+_ACTIVE_JOB_STATUSES = frozenset(
+    {'SUBMITTED', 'QUEUED', 'IN_PROGRESS', 'CANCEL_SUBMITTED', 'CANCEL_IN_PROGRESS'}
+)
+
+# Datastore statuses that are still changing, so describe responses for them are never cached
+_TRANSITIONAL_DATASTORE_STATUSES = frozenset({'CREATING', 'DELETING'})
+
+# Most read-only responses kept in the cache
+RESPONSE_CACHE_SIZE = 1024
+
+# (operation, region, request params) -> (response, time it was fetched), oldest first
+_response_cache: Dict[Tuple[Any, ...], Tuple[Dict[str, Any], float]] = {}
+
+# Most response-body bytes kept for revalidating FHIR GETs with If-None-Match
+ETAG_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Signed request URL -> (ETag, raw response body), least recently used first
+_etag_cache: Dict[str, Tuple[str, bytes]] = {}
+
+# Total size of the bodies in _etag_cache
+_etag_cache_bytes = 0
+
+# Code system for create_observation_template's category
+OBSERVATION_CATEGORY_SYSTEM = 'http://terminology.hl7.org/CodeSystem/observation-category'
+
+# Allowed FHIR Resource.id values, per the FHIR id datatype
+_FHIR_ID_RE = re.compile(r'[A-Za-z0-9\-.]{1,64}')
+
+# Fields validate_fhir_resource requires, by resource type (FHIR R4 elements with a
+# minimum cardinality of 1, leaving out choice-type [x] elements)
+_REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'AllergyIntolerance': ('patient',),
+    'Bundle': ('type',),
+    'CarePlan': ('status', 'intent', 'subject'),
+    'Composition': ('status', 'type', 'date', 'author', 'title'),
+    'Condition': ('subject',),
+    'Coverage': ('status', 'beneficiary', 'payor'),
+    'DiagnosticReport': ('status', 'code'),
+    'DocumentReference': ('status', 'content'),
+    'Encounter': ('status', 'class'),
+    'Goal': ('lifecycleStatus', 'description', 'subject'),
+    'Immunization': ('status', 'vaccineCode', 'patient'),
+    'MedicationRequest': ('status', 'intent', 'subject'),
+    'Observation': ('status', 'code'),
+    'Procedure': ('status', 'subject'),
+    'ServiceRequest': ('status', 'intent', 'subject'),
+}
+
+# Fields of which validate_fhir_resource expects at least one, by resource type
+_RECOMMENDED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'Patient': ('name', 'identifier'),
+}
+
+# Settings read from the environment once at import, since the server's environment
+# does not change while it runs
+_DEFAULT_REGION = 'us-west-2'
+_ENDPOINT_CACHE_TTL = float(DEFAULT_ENDPOINT_CACHE_TTL_SECONDS)
+_RESPONSE_CACHE_TTL = float(DEFAULT_RESPONSE_CACHE_TTL_SECONDS)
+_CAPABILITIES_CACHE_TTL = float(DEFAULT_CAPABILITIES_CACHE_TTL_SECONDS)
+
+
+def _reload_config() -> None:
+    """Read the default region, cache TTLs and read-only mode from the environment."""
+    global _DEFAULT_REGION, _ENDPOINT_CACHE_TTL, _RESPONSE_CACHE_TTL, _CAPABILITIES_CACHE_TTL
+    _DEFAULT_REGION = os.getenv('AWS_REGION', 'us-west-2')
+    _ENDPOINT_CACHE_TTL = float(
+        os.getenv('HEALTHLAKE_MCP_ENDPOINT_TTL', str(DEFAULT_ENDPOINT_CACHE_TTL_SECONDS))
+    )
+    _RESPONSE_CACHE_TTL = float(
+        os.getenv('HEALTHLAKE_MCP_CACHE_TTL', str(DEFAULT_RESPONSE_CACHE_TTL_SECONDS))
+    )
+    _CAPABILITIES_CACHE_TTL = float(
+        os.getenv('HEALTHLAKE_MCP_CAPABILITIES_TTL', str(DEFAULT_CAPABILITIES_CACHE_TTL_SECONDS))
+    )
+    reload_read_only()
+
+
+_reload_config()
+
+# boto3's default session is not thread-safe while creating clients
+_client_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=16)
+def _create_healthlake_client(region_name: str):
+    """Create a HealthLake client for a region."""
+    config = Config(
+        region_name=region_name,
+        retries={'max_attempts': 3, 'mode': 'standard'},
+        max_pool_connections=_max_pool_connections(),
+        tcp_keepalive=True,
+    )
+
+    return boto3.client('healthlake', config=config)
+
 
 def get_healthlake_client(region_name: Optional[str] = None):
-    """Get a HealthLake client with proper configuration."""
+    """Get a HealthLake client with proper configuration.
+
+    Clients are cached per region so the service model and connection pool are
+    built once and reused across tool calls.
+    """
     if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
+        region_name = _DEFAULT_REGION
 
-    config = Config(region_name=region_name, retries={'max_attempts': 3, 'mode': 'adaptive'})
+    with _client_lock:
+        return _create_healthlake_client(region_name)
 
-    return boto3.client('healthlake', config=config)
+
+def _cached_fhir_endpoint(key: Tuple[str, str]) -> Optional[str]:
+    """Get a datastore's endpoint from the cache if it has not expired."""
+    cached = _endpoint_cache.get(key)
+    if cached and time.monotonic() - cached[1] < _ENDPOINT_CACHE_TTL:
+        return cached[0]
+    return None
 
 
 def _get_fhir_endpoint(datastore_id: str, region_name: Optional[str] = None) -> str:
-    """Get the FHIR endpoint URL for a datastore."""
+    """Get the FHIR endpoint URL for a datastore.
+
+    A datastore's endpoint does not change, so lookups are cached for
+    HEALTHLAKE_MCP_ENDPOINT_TTL seconds instead of calling describe on every FHIR request.
+    """
+    if not region_name:
+        region_name = _DEFAULT_REGION
+
+    key = (region_name, datastore_id)
+    endpoint = _cached_fhir_endpoint(key)
+    if endpoint:
+        return endpoint
+
     client = get_healthlake_client(region_name)
     datastore_info = client.describe_fhir_datastore(DatastoreId=datastore_id)
-    return datastore_info['DatastoreProperties']['DatastoreEndpoint']
+    endpoint = datastore_info['DatastoreProperties']['DatastoreEndpoint']
+    _endpoint_cache[key] = (endpoint, time.monotonic())
+    return endpoint
+
+
+async def _fhir_endpoint(datastore_id: str, region_name: Optional[str] = None) -> str:
+    """Get the FHIR endpoint URL for a datastore without blocking the event loop.
+
+    Cache hits return immediately. Concurrent misses for the same datastore share a single
+    describe call instead of each making their own.
+    """
+    key = (region_name or _DEFAULT_REGION, datastore_id)
+    endpoint = _cached_fhir_endpoint(key)
+    if endpoint:
+        return endpoint
+
+    lookup = _endpoint_lookups.get(key)
+    if lookup is None:
+        lookup = asyncio.ensure_future(_run_blocking(_get_fhir_endpoint, datastore_id, key[0]))
+        _endpoint_lookups[key] = lookup
+        lookup.add_done_callback(lambda _: _endpoint_lookups.pop(key, None))
+
+    # Shielded so one caller being cancelled does not cancel the lookup for the others
+    return await asyncio.shield(lookup)
+
+
+async def _call_healthlake(
+    region_name: Optional[str], operation: str, **params: Any
+) -> Dict[str, Any]:
+    """Call a HealthLake API by operation name on the region's client, off the event loop."""
+    client = get_healthlake_client(region_name)
+    return await _run_blocking(getattr(client, operation), **params)
+
+
+async def _cached_call(region_name: Optional[str], operation: str, **params) -> Dict[str, Any]:
+    """Call a read-only HealthLake API, caching the response for HEALTHLAKE_MCP_CACHE_TTL seconds.
+
+    The cache is disabled by default. Describe responses for jobs that are still running,
+    or for datastores still being created or deleted, are never cached, so polling always
+    sees the latest status.
+    """
+    ttl = _RESPONSE_CACHE_TTL
+    if ttl <= 0:
+        return await _call_healthlake(region_name, operation, **params)
+
+    client = get_healthlake_client(region_name)
+    key = (operation, client.meta.region_name, tuple(sorted(params.items())))
+    cached = _response_cache.get(key)
+    if cached and time.monotonic() - cached[1] < ttl:
+        return copy.deepcopy(cached[0])
+
+    response = await _run_blocking(getattr(client, operation), **params)
+    job = response.get('ImportJobProperties') or response.get('ExportJobProperties') or {}
+    datastore = response.get('DatastoreProperties') or {}
+    if (
+        job.get('JobStatus') not in _ACTIVE_JOB_STATUSES
+        and datastore.get('DatastoreStatus') not in _TRANSITIONAL_DATASTORE_STATUSES
+    ):
+        now = time.monotonic()
+        _response_cache.pop(key, None)
+        # Entries are kept in fetch order, so expired ones are always at the front
+        while _response_cache and (
+            len(_response_cache) >= RESPONSE_CACHE_SIZE
+            or now - next(iter(_response_cache.values()))[1] >= ttl
+        ):
+            del _response_cache[next(iter(_response_cache))]
+        _response_cache[key] = (copy.deepcopy(response), now)
+    return response
 
 
-def _make_fhir_request(
+def _invalidate_cached(resource_id: str) -> None:
+    """Drop cached responses for requests that referenced a datastore ID or resource ARN."""
+    for key in [key for key in _response_cache if any(v == resource_id for _, v in key[2])]:
+        _response_cache.pop(key, None)
+
+
+async def _list_pages(
+    region_name: Optional[str], operation: str, result_key: str, fetch_all: bool, **params
+) -> Dict[str, Any]:
+    """Call a HealthLake list API, following NextToken to collect every page if fetch_all is set.
+
+    HealthLake has no boto3 paginators, so pages are followed manually. At most
+    MAX_LIST_PAGES pages are fetched; if more remain, the last NextToken is returned.
+    """
+    list_method = getattr(get_healthlake_client(region_name), operation)
+    response = await _run_blocking(list_method, **params)
+    if not fetch_all:
+        return response
+
+    items = list(response.get(result_key, []))
+    for _ in range(MAX_LIST_PAGES - 1):
+        if not response.get('NextToken'):
+            break
+        response = await _run_blocking(
+            list_method, **{**params, 'NextToken': response['NextToken']}
+        )
+        items.extend(response.get(result_key, []))
+
+    result: Dict[str, Any] = {result_key: items}
+    if response.get('NextToken'):
+        result['NextToken'] = response['NextToken']
+    return result
+
+
+async def _run_blocking(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call, such as a boto3 request, on the worker thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def _with_region(func: F) -> F:
+    """Decorator that fills in an async tool's region_name with the default region when unset."""
+    position = list(inspect.signature(func).parameters).index('region_name')
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if len(args) > position:
+            if not args[position]:
+                args = (*args[:position], _DEFAULT_REGION, *args[position + 1 :])
+        elif not kwargs.get('region_name'):
+            kwargs['region_name'] = _DEFAULT_REGION
+        return await func(*args, **kwargs)
+
+    return cast(F, wrapper)
+
+
+def _drop_empty(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove unset (None or empty) values from request parameters or headers."""
+    return {key: value for key, value in params.items() if value}
+
+
+@functools.lru_cache(maxsize=1)
+def _get_boto3_session() -> boto3.Session:
+    """Get the boto3 session used to sign FHIR requests.
+
+    The session caches the credentials it resolves. Refreshable credentials, such as
+    those from an assumed role, refresh themselves before they expire.
+    """
+    return boto3.Session()
+
+
+def _frozen_credentials() -> ReadOnlyCredentials:
+    """Resolve and snapshot the credentials used to sign FHIR requests.
+
+    The first call walks the provider chain and refreshable credentials refresh near
+    expiry, both of which can block on STS or instance metadata, so call this through
+    _run_blocking.
+    """
+    credentials = _get_boto3_session().get_credentials()
+    if credentials is None:
+        raise NoCredentialsError()
+    return credentials.get_frozen_credentials()
+
+
+@functools.lru_cache(maxsize=8)
+def _get_signer(region_name: str, credentials: ReadOnlyCredentials) -> SigV4Auth:
+    """Get a SigV4 signer for FHIR requests in a region.
+
+    Signers are cached per region and credentials snapshot, so one is only built again
+    when the credentials refresh.
+    """
+    return SigV4Auth(credentials, 'healthlake', region_name)
+
+
+def _retry_delay(previous_delay: float, response: Optional[httpx.Response] = None) -> float:
+    """Get the delay before retrying a FHIR request, honoring Retry-After if present.
+
+    Uses decorrelated jitter: each delay is drawn between the base delay and three times
+    the previous one, so concurrent retries spread out instead of arriving in waves.
+    """
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(FHIR_BACKOFF_CAP_SECONDS, float(retry_after))
+
+    return min(
+        FHIR_BACKOFF_CAP_SECONDS, random.uniform(FHIR_BACKOFF_BASE_SECONDS, previous_delay * 3)
+    )
+
+
+async def _send_with_backoff(method: str, **kwargs) -> httpx.Response:
+    """Send a FHIR request over the shared client, retrying throttling and transient errors."""
+    idempotent = method in _IDEMPOTENT_METHODS
+    retryable_status_codes = _THROTTLING_STATUS_CODES
+    if idempotent:
+        retryable_status_codes = retryable_status_codes | _TRANSIENT_STATUS_CODES
+
+    delay = FHIR_BACKOFF_BASE_SECONDS
+    for _ in range(FHIR_MAX_ATTEMPTS - 1):
+        try:
+            async with _fhir_semaphore:
+                response = await _http_client.request(method, **kwargs)
+        except httpx.TransportError as e:
+            if not idempotent and not isinstance(e, _UNSENT_REQUEST_ERRORS):
+                raise
+            logger.warning('FHIR {} transport error, retrying: {}', method, e)
+            delay = _retry_delay(delay)
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status_code not in retryable_status_codes:
+            return response
+
+        logger.warning('FHIR {} returned HTTP {}, retrying', method, response.status_code)
+        delay = _retry_delay(delay, response)
+        await asyncio.sleep(delay)
+
+    # Last attempt: return the response or raise the error as-is
+    async with _fhir_semaphore:
+        return await _http_client.request(method, **kwargs)
+
+
+def _fhir_instant() -> str:
+    """Get the current UTC time as a FHIR instant with second precision."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _bundle_entry_request(resource: Dict[str, Any]) -> Dict[str, str]:
+    """Get the request for a transaction or batch bundle entry: PUT if it has an ID, else POST."""
+    resource_type = resource.get('resourceType', '')
+    if 'id' in resource:
+        return {'method': 'PUT', 'url': f'{resource_type}/{resource["id"]}'}
+    return {'method': 'POST', 'url': resource_type}
+
+
+def _build_bundle(resources: List[Dict[str, Any]], bundle_type: str) -> Dict[str, Any]:
+    """Build a FHIR Bundle, adding a request to each entry for transaction and batch bundles."""
+    if bundle_type in ('transaction', 'batch'):
+        entries = [
+            {'resource': resource, 'request': _bundle_entry_request(resource)}
+            for resource in resources
+        ]
+    else:
+        entries = [{'resource': resource} for resource in resources]
+
+    return {
+        'resourceType': 'Bundle',
+        'id': str(uuid.uuid4()),
+        'type': bundle_type,
+        'timestamp': _fhir_instant(),
+        'entry': entries,
+    }
+
+
+class _FhirRequestError(Exception):
+    """A FHIR request that HealthLake answered with an error status."""
+
+    def __init__(self, message: str, status_code: int):
+        """Create the error with the HTTP status HealthLake returned."""
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _failed_batch_entries(count: int, error: Exception) -> List[Dict[str, Any]]:
+    """Build batch-response entries reporting that a chunk of `count` entries failed."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    else:
+        status = getattr(error, 'status_code', 500)
+    response = {
+        'status': str(status),
+        'outcome': {
+            'resourceType': 'OperationOutcome',
+            'issue': [{'severity': 'error', 'code': 'exception', 'diagnostics': str(error)}],
+        },
+    }
+    return [{'response': response} for _ in range(count)]
+
+
+def _store_etag(url: str, etag: str, content: bytes) -> None:
+    """Keep a GET response body for revalidation, evicting least recently used bodies."""
+    global _etag_cache_bytes
+    if len(content) > ETAG_CACHE_MAX_BYTES:
+        return
+    previous = _etag_cache.pop(url, None)
+    if previous:
+        _etag_cache_bytes -= len(previous[1])
+    while _etag_cache and _etag_cache_bytes + len(content) > ETAG_CACHE_MAX_BYTES:
+        _etag_cache_bytes -= len(_etag_cache.pop(next(iter(_etag_cache)))[1])
+    _etag_cache[url] = (etag, content)
+    _etag_cache_bytes += len(content)
+
+
+def _clear_etag_cache() -> None:
+    """Drop every response kept for revalidation."""
+    global _etag_cache_bytes
+    _etag_cache.clear()
+    _etag_cache_bytes = 0
+
+
+def _format_issue(issue: Dict[str, Any]) -> str:
+    """Format a FHIR OperationOutcome issue as 'SEVERITY: code - details'."""
+    details = issue.get('details', {}).get('text', issue.get('diagnostics', ''))
+    return f'{issue.get("severity", "error").upper()}: {issue.get("code", "unknown")} - {details}'
+
+
+def _bundle_to_columns(bundle: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+    """Transpose a search Bundle's entries into one list per requested resource field.
+
+    Entries without a field get None in its list, so every column lines up by entry. The
+    Bundle's total (None when the server did not report one) and paging links are kept.
+    """
+    resources = [entry.get('resource', {}) for entry in bundle.get('entry', [])]
+    return {
+        'total': bundle.get('total'),
+        'link': bundle.get('link', []),
+        'columns': {
+            column: [resource.get(column) for resource in resources] for column in columns
+        },
+    }
+
+
+async def _make_fhir_request(
     method: str,
     url: str,
     region_name: str,
@@ -61,74 +589,82 @@ def _make_fhir_request(
     headers: Optional[Dict[str, str]] = None,
 ) -> Dict[str, Any]:
     """Make an authenticated FHIR API request to HealthLake."""
-    # Get AWS SigV4 signed headers
-    session = boto3.Session()
-    credentials = session.get_credentials()
+    # Resolve credentials off the event loop, since they may need a network round trip
+    credentials = await _run_blocking(_frozen_credentials)
 
     # Prepare headers
     request_headers = {'Content-Type': 'application/fhir+json', 'Accept': 'application/fhir+json'}
     if headers:
         request_headers.update(headers)
 
-    # Create a request with AWS SigV4 authentication
-    import json as json_module
+    # Encode the query string ourselves (RFC 3986, repeated keys for lists) so the
+    # URL we sign is exactly the URL we send
+    if params:
+        url = f'{url}?{urlencode(params, doseq=True, quote_via=quote)}'
+
+    # Revalidate a response we already have instead of downloading it again
+    cached = _etag_cache.get(url) if method == 'GET' else None
+    if cached:
+        request_headers['If-None-Match'] = cached[0]
 
     # Create an AWS request for signing
     aws_request = AWSRequest(
         method=method,
         url=url,
-        data=json_module.dumps(json_data) if json_data else None,
-        params=params,
+        data=orjson.dumps(json_data) if json_data else None,
         headers=request_headers,
     )
 
     # Sign the request
-    auth = SigV4Auth(credentials, 'healthlake', region_name)
-    auth.add_auth(aws_request)
-
-    # Convert back to requests format and send
-    with requests.Session() as session:
-        response = session.request(
-            method=aws_request.method,
-            url=aws_request.url,
-            headers=dict(aws_request.headers),
-            data=aws_request.body,
-            params=params,
-        )
+    _get_signer(region_name, credentials).add_auth(aws_request)
+
+    # Send the signed request over the shared HTTP client
+    response = await _send_with_backoff(
+        method=aws_request.method,
+        url=aws_request.url,
+        headers=dict(aws_request.headers),
+        content=aws_request.body,
+    )
 
-        # Handle FHIR-specific error responses
-        if not response.ok:
-            try:
-                error_data = response.json()
-                if error_data.get('resourceType') == 'OperationOutcome':
-                    # Extract FHIR OperationOutcome details
-                    issues = error_data.get('issue', [])
-                    error_messages = []
-                    for issue in issues:
-                        severity = issue.get('severity', 'error')
-                        code = issue.get('code', 'unknown')
-                        details = issue.get('details', {}).get(
-                            'text', issue.get('diagnostics', '')
-                        )
-                        error_messages.append(f'{severity.upper()}: {code} - {details}')
-
-                    raise Exception(f'FHIR Operation Failed: {"; ".join(error_messages)}')
-                else:
-                    raise Exception(f'HTTP {response.status_code}: {response.text}')
-            except ValueError:
-                # Not JSON response
-                response.raise_for_status()
-
-        # Return JSON response or empty dict for successful operations without content
-        if response.content:
-            return response.json()
-        else:
-            return {'status': 'success', 'statusCode': response.status_code}
+    if cached and response.status_code == 304:
+        # Move the entry to the end so eviction drops the least recently used first
+        entry = _etag_cache.pop(url, None)
+        if entry:
+            _etag_cache[url] = entry
+        return orjson.loads(cached[1])
+
+    # Handle FHIR-specific error responses
+    if response.is_error:
+        try:
+            error_data = orjson.loads(response.content)
+            if error_data.get('resourceType') == 'OperationOutcome':
+                # Extract FHIR OperationOutcome details
+                error_messages = '; '.join(map(_format_issue, error_data.get('issue', [])))
+                raise _FhirRequestError(
+                    f'FHIR Operation Failed: {error_messages}', response.status_code
+                )
+            else:
+                raise _FhirRequestError(
+                    f'HTTP {response.status_code}: {response.text}', response.status_code
+                )
+        except ValueError:
+            # Not JSON response
+            response.raise_for_status()
+
+    # Return JSON response or empty dict for successful operations without content
+    if not response.content:
+        return {'status': 'success', 'statusCode': response.status_code}
+
+    body = orjson.loads(response.content)
+    etag = response.headers.get('ETag')
+    if method == 'GET' and etag:
+        _store_etag(url, etag, response.content)
+    return body
 
 
-@mcp.tool()
 @handle_exceptions
-def create_datastore(
+@_with_region
+async def create_datastore(
     datastore_type_version: str,
     datastore_name: Optional[str] = None,
     sse_configuration: Optional[Dict[str, Any]] = None,
@@ -155,31 +691,26 @@ def create_datastore(
     """
     mutation_check()
 
-    client = get_healthlake_client(region_name)
-
     # Build the request parameters
-    params = {'DatastoreTypeVersion': datastore_type_version}
-
-    if datastore_name:
-        params['DatastoreName'] = datastore_name
-    if sse_configuration:
-        params['SseConfiguration'] = sse_configuration
-    if preload_data_config:
-        params['PreloadDataConfig'] = preload_data_config
-    if client_token:
-        params['ClientToken'] = client_token
-    if tags:
-        params['Tags'] = [Tag(**tag).model_dump(by_alias=True) for tag in tags]
-    if identity_provider_configuration:
-        params['IdentityProviderConfiguration'] = identity_provider_configuration
-
-    response = client.create_fhir_datastore(**params)
+    params = _drop_empty(
+        {
+            'DatastoreTypeVersion': datastore_type_version,
+            'DatastoreName': datastore_name,
+            'SseConfiguration': sse_configuration,
+            'PreloadDataConfig': preload_data_config,
+            'ClientToken': client_token,
+            'Tags': tags_to_aws(tags) if tags else None,
+            'IdentityProviderConfiguration': identity_provider_configuration,
+        }
+    )
+
+    response = await _call_healthlake(region_name, 'create_fhir_datastore', **params)
     return response
 
 
-@mcp.tool()
 @handle_exceptions
-def delete_datastore(datastore_id: str, region_name: Optional[str] = None) -> Dict[str, Any]:
+@_with_region
+async def delete_datastore(datastore_id: str, region_name: Optional[str] = None) -> Dict[str, Any]:
     """Delete a HealthLake datastore.
 
     Args:
@@ -191,14 +722,21 @@ def delete_datastore(datastore_id: str, region_name: Optional[str] = None) -> Di
     """
     mutation_check()
 
-    client = get_healthlake_client(region_name)
-    response = client.delete_fhir_datastore(DatastoreId=datastore_id)
+    response = await _call_healthlake(
+        region_name, 'delete_fhir_datastore', DatastoreId=datastore_id
+    )
+    key = (cast(str, region_name), datastore_id)  # set by _with_region
+    _endpoint_cache.pop(key, None)
+    _capabilities_cache.pop(key, None)
+    _invalidate_cached(datastore_id)
     return response
 
 
-@mcp.tool()
 @handle_exceptions
-def describe_datastore(datastore_id: str, region_name: Optional[str] = None) -> Dict[str, Any]:
+@_with_region
+async def describe_datastore(
+    datastore_id: str, region_name: Optional[str] = None
+) -> Dict[str, Any]:
     """Describe a HealthLake datastore.
 
     Args:
@@ -208,17 +746,16 @@ def describe_datastore(datastore_id: str, region_name: Optional[str] = None) ->
     Returns:
         Dict containing the datastore description
     """
-    client = get_healthlake_client(region_name)
-    response = client.describe_fhir_datastore(DatastoreId=datastore_id)
-    return response
+    return await _cached_call(region_name, 'describe_fhir_datastore', DatastoreId=datastore_id)
 
 
-@mcp.tool()
 @handle_exceptions
-def list_datastores(
+@_with_region
+async def list_datastores(
     filter_dict: Optional[Dict[str, Any]] = None,
     next_token: Optional[str] = None,
     max_results: Optional[int] = None,
+    fetch_all: bool = False,
     region_name: Optional[str] = None,
 ) -> Dict[str, Any]:
     """List HealthLake datastores.
@@ -226,29 +763,25 @@ def list_datastores(
     Args:
         filter_dict: Optional filter to apply to the datastore list
         next_token: Optional token for pagination
-        max_results: Optional maximum number of results to return
+        max_results: Optional maximum number of results to return per page
+        fetch_all: Follow pagination and return the datastores from all pages in one response
         region_name: AWS region name (defaults to AWS_REGION env var or us-west-2)
 
     Returns:
         Dict containing the list of datastores
     """
-    client = get_healthlake_client(region_name)
+    params = _drop_empty(
+        {'Filter': filter_dict, 'NextToken': next_token, 'MaxResults': max_results}
+    )
 
-    params = {}
-    if filter_dict:
-        params['Filter'] = filter_dict
-    if next_token:
-        params['NextToken'] = next_token
-    if max_results:
-        params['MaxResults'] = max_results
-
-    response = client.list_fhir_datastores(**params)
-    return response
+    return await _list_pages(
+        region_name, 'list_fhir_datastores', 'DatastorePropertiesList', fetch_all, **params
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def start_fhir_import_job(
+@_with_region
+async def start_fhir_import_job(
     input_data_config: Dict[str, Any],
     job_output_data_config: Dict[str, Any],
     datastore_id: str,
@@ -273,27 +806,24 @@ def start_fhir_import_job(
     """
     mutation_check()
 
-    client = get_healthlake_client(region_name)
-
-    params = {
-        'InputDataConfig': input_data_config,
-        'JobOutputDataConfig': job_output_data_config,
-        'DatastoreId': datastore_id,
-        'DataAccessRoleArn': data_access_role_arn,
-    }
-
-    if job_name:
-        params['JobName'] = job_name
-    if client_token:
-        params['ClientToken'] = client_token
+    params = _drop_empty(
+        {
+            'InputDataConfig': input_data_config,
+            'JobOutputDataConfig': job_output_data_config,
+            'DatastoreId': datastore_id,
+            'DataAccessRoleArn': data_access_role_arn,
+            'JobName': job_name,
+            'ClientToken': client_token,
+        }
+    )
 
-    response = client.start_fhir_import_job(**params)
+    response = await _call_healthlake(region_name, 'start_fhir_import_job', **params)
     return response
 
 
-@mcp.tool()
 @handle_exceptions
-def start_fhir_export_job(
+@_with_region
+async def start_fhir_export_job(
     output_data_config: Dict[str, Any],
     datastore_id: str,
     data_access_role_arn: str,
@@ -316,26 +846,23 @@ def start_fhir_export_job(
     """
     mutation_check()
 
-    client = get_healthlake_client(region_name)
-
-    params = {
-        'OutputDataConfig': output_data_config,
-        'DatastoreId': datastore_id,
-        'DataAccessRoleArn': data_access_role_arn,
-    }
-
-    if job_name:
-        params['JobName'] = job_name
-    if client_token:
-        params['ClientToken'] = client_token
+    params = _drop_empty(
+        {
+            'OutputDataConfig': output_data_config,
+            'DatastoreId': datastore_id,
+            'DataAccessRoleArn': data_access_role_arn,
+            'JobName': job_name,
+            'ClientToken': client_token,
+        }
+    )
 
-    response = client.start_fhir_export_job(**params)
+    response = await _call_healthlake(region_name, 'start_fhir_export_job', **params)
     return response
 
 
-@mcp.tool()
 @handle_exceptions
-def describe_fhir_import_job(
+@_with_region
+async def describe_fhir_import_job(
     datastore_id: str, job_id: str, region_name: Optional[str] = None
 ) -> Dict[str, Any]:
     """Describe a FHIR import job.
@@ -348,14 +875,14 @@ def describe_fhir_import_job(
     Returns:
         Dict containing the import job description
     """
-    client = get_healthlake_client(region_name)
-    response = client.describe_fhir_import_job(DatastoreId=datastore_id, JobId=job_id)
-    return response
+    return await _cached_call(
+        region_name, 'describe_fhir_import_job', DatastoreId=datastore_id, JobId=job_id
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def describe_fhir_export_job(
+@_with_region
+async def describe_fhir_export_job(
     datastore_id: str, job_id: str, region_name: Optional[str] = None
 ) -> Dict[str, Any]:
     """Describe a FHIR export job.
@@ -368,14 +895,14 @@ def describe_fhir_export_job(
     Returns:
         Dict containing the export job description
     """
-    client = get_healthlake_client(region_name)
-    response = client.describe_fhir_export_job(DatastoreId=datastore_id, JobId=job_id)
-    return response
+    return await _cached_call(
+        region_name, 'describe_fhir_export_job', DatastoreId=datastore_id, JobId=job_id
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def list_fhir_import_jobs(
+@_with_region
+async def list_fhir_import_jobs(
     datastore_id: str,
     next_token: Optional[str] = None,
     max_results: Optional[int] = None,
@@ -383,6 +910,7 @@ def list_fhir_import_jobs(
     job_status: Optional[str] = None,
     submitted_before: Optional[str] = None,
     submitted_after: Optional[str] = None,
+    fetch_all: bool = False,
     region_name: Optional[str] = None,
 ) -> Dict[str, Any]:
     """List FHIR import jobs.
@@ -390,40 +918,37 @@ def list_fhir_import_jobs(
     Args:
         datastore_id: The AWS-generated ID for the datastore
         next_token: Optional token for pagination
-        max_results: Optional maximum number of results to return
+        max_results: Optional maximum number of results to return per page
         job_name: Optional job name filter
         job_status: Optional job status filter
         submitted_before: Optional filter for jobs submitted before this date
         submitted_after: Optional filter for jobs submitted after this date
+        fetch_all: Follow pagination and return the jobs from all pages in one response
         region_name: AWS region name (defaults to AWS_REGION env var or us-west-2)
 
     Returns:
         Dict containing the list of import jobs
     """
-    client = get_healthlake_client(region_name)
+    params = _drop_empty(
+        {
+            'DatastoreId': datastore_id,
+            'NextToken': next_token,
+            'MaxResults': max_results,
+            'JobName': job_name,
+            'JobStatus': job_status,
+            'SubmittedBefore': submitted_before,
+            'SubmittedAfter': submitted_after,
+        }
+    )
 
-    params = {'DatastoreId': datastore_id}
-
-    if next_token:
-        params['NextToken'] = next_token
-    if max_results:
-        params['MaxResults'] = max_results
-    if job_name:
-        params['JobName'] = job_name
-    if job_status:
-        params['JobStatus'] = job_status
-    if submitted_before:
-        params['SubmittedBefore'] = submitted_before
-    if submitted_after:
-        params['SubmittedAfter'] = submitted_after
-
-    response = client.list_fhir_import_jobs(**params)
-    return response
+    return await _list_pages(
+        region_name, 'list_fhir_import_jobs', 'ImportJobPropertiesList', fetch_all, **params
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def list_fhir_export_jobs(
+@_with_region
+async def list_fhir_export_jobs(
     datastore_id: str,
     next_token: Optional[str] = None,
     max_results: Optional[int] = None,
@@ -431,6 +956,7 @@ def list_fhir_export_jobs(
     job_status: Optional[str] = None,
     submitted_before: Optional[str] = None,
     submitted_after: Optional[str] = None,
+    fetch_all: bool = False,
     region_name: Optional[str] = None,
 ) -> Dict[str, Any]:
     """List FHIR export jobs.
@@ -438,40 +964,37 @@ def list_fhir_export_jobs(
     Args:
         datastore_id: The AWS-generated ID for the datastore
         next_token: Optional token for pagination
-        max_results: Optional maximum number of results to return
+        max_results: Optional maximum number of results to return per page
         job_name: Optional job name filter
         job_status: Optional job status filter
         submitted_before: Optional filter for jobs submitted before this date
         submitted_after: Optional filter for jobs submitted after this date
+        fetch_all: Follow pagination and return the jobs from all pages in one response
         region_name: AWS region name (defaults to AWS_REGION env var or us-west-2)
 
     Returns:
         Dict containing the list of export jobs
     """
-    client = get_healthlake_client(region_name)
+    params = _drop_empty(
+        {
+            'DatastoreId': datastore_id,
+            'NextToken': next_token,
+            'MaxResults': max_results,
+            'JobName': job_name,
+            'JobStatus': job_status,
+            'SubmittedBefore': submitted_before,
+            'SubmittedAfter': submitted_after,
+        }
+    )
 
-    params = {'DatastoreId': datastore_id}
-
-    if next_token:
-        params['NextToken'] = next_token
-    if max_results:
-        params['MaxResults'] = max_results
-    if job_name:
-        params['JobName'] = job_name
-    if job_status:
-        params['JobStatus'] = job_status
-    if submitted_before:
-        params['SubmittedBefore'] = submitted_before
-    if submitted_after:
-        params['SubmittedAfter'] = submitted_after
-
-    response = client.list_fhir_export_jobs(**params)
-    return response
+    return await _list_pages(
+        region_name, 'list_fhir_export_jobs', 'ExportJobPropertiesList', fetch_all, **params
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def read_fhir_resource(
+@_with_region
+async def read_fhir_resource(
     datastore_id: str,
     resource_type: str,
     resource_id: str,
@@ -490,11 +1013,8 @@ def read_fhir_resource(
     Returns:
         Dict containing the FHIR resource
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR resource
     if version_id:
@@ -502,12 +1022,46 @@ def read_fhir_resource(
     else:
         url = f'{endpoint}{resource_type}/{resource_id}'
 
-    return _make_fhir_request('GET', url, region_name)
+    return await _make_fhir_request('GET', url, region_name)
 
 
-@mcp.tool()
 @handle_exceptions
-def search_fhir_resources(
+@_with_region
+async def read_fhir_resources_bulk(
+    datastore_id: str,
+    items: List[Dict[str, str]],
+    region_name: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Read multiple FHIR resources by ID concurrently using HealthLake FHIR API.
+
+    Args:
+        datastore_id: The AWS-generated ID for the datastore
+        items: List of resources to read, each with 'resource_type' and 'resource_id' keys
+        region_name: AWS region name (defaults to AWS_REGION env var or us-west-2)
+
+    Returns:
+        List with one entry per item, in the same order: the FHIR resource, or a dict with
+        an 'error' key if that read failed
+    """
+    # Get the datastore endpoint once for all reads
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
+
+    # Concurrency is bounded by the shared FHIR request semaphore
+    async def read_one(item: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            url = f'{endpoint}{item["resource_type"]}/{item["resource_id"]}'
+            return await _make_fhir_request('GET', url, region_name)
+        except Exception as e:
+            if isinstance(item, dict):
+                return {**item, 'error': str(e)}
+            return {'item': item, 'error': str(e)}
+
+    return list(await asyncio.gather(*(read_one(item) for item in items)))
+
+
+@handle_exceptions
+@_with_region
+async def search_fhir_resources(
     datastore_id: str,
     resource_type: str,
     query_parameters: Optional[Dict[str, str]] = None,
@@ -524,21 +1078,18 @@ def search_fhir_resources(
     Returns:
         Dict containing the search results as a FHIR Bundle
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR search
     url = f'{endpoint}{resource_type}'
 
-    return _make_fhir_request('GET', url, region_name, params=query_parameters)
+    return await _make_fhir_request('GET', url, region_name, params=query_parameters)
 
 
-@mcp.tool()
 @handle_exceptions
-def create_fhir_resource(
+@_with_region
+async def create_fhir_resource(
     datastore_id: str,
     resource_type: str,
     resource_data: Dict[str, Any],
@@ -559,37 +1110,34 @@ def create_fhir_resource(
     """
     mutation_check()
 
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Validate that resourceType matches the URL
     if resource_data.get('resourceType') != resource_type:
         raise ValueError(
             f"Resource type mismatch: URL specifies '{resource_type}' but resource contains '{resource_data.get('resourceType')}'"
         )
 
-    # Remove id field for create operations (server will assign)
-    resource_data = resource_data.copy()
+    # Remove id field for create operations (server will assign). The caller's dict is
+    # left untouched, and only copied when there is an id to remove.
     if 'id' in resource_data:
-        del resource_data['id']
+        resource_data = {key: value for key, value in resource_data.items() if key != 'id'}
 
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR resource
     url = f'{endpoint}{resource_type}'
 
     # Add conditional create header if specified
-    headers = {}
-    if if_none_exist:
-        headers['If-None-Exist'] = if_none_exist
+    headers = _drop_empty({'If-None-Exist': if_none_exist})
 
-    return _make_fhir_request('POST', url, region_name, json_data=resource_data, headers=headers)
+    return await _make_fhir_request(
+        'POST', url, region_name, json_data=resource_data, headers=headers
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def update_fhir_resource(
+@_with_region
+async def update_fhir_resource(
     datastore_id: str,
     resource_type: str,
     resource_id: str,
@@ -612,41 +1160,38 @@ def update_fhir_resource(
     """
     mutation_check()
 
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Validate that resourceType matches the URL
     if resource_data.get('resourceType') != resource_type:
         raise ValueError(
             f"Resource type mismatch: URL specifies '{resource_type}' but resource contains '{resource_data.get('resourceType')}'"
         )
 
-    # Ensure the resource ID in the URL matches the one in the resource data
-    resource_data = resource_data.copy()
+    # Ensure the resource ID in the URL matches the one in the resource data. The caller's
+    # dict is left untouched, and only copied when the id has to be added.
     if 'id' not in resource_data:
-        resource_data['id'] = resource_id
+        resource_data = {**resource_data, 'id': resource_id}
     elif resource_data['id'] != resource_id:
         raise ValueError(
             f"Resource ID mismatch: URL specifies '{resource_id}' but resource contains '{resource_data['id']}'"
         )
 
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR resource
     url = f'{endpoint}{resource_type}/{resource_id}'
 
     # Add conditional update header if specified
-    headers = {}
-    if if_match:
-        headers['If-Match'] = if_match
+    headers = _drop_empty({'If-Match': if_match})
 
-    return _make_fhir_request('PUT', url, region_name, json_data=resource_data, headers=headers)
+    return await _make_fhir_request(
+        'PUT', url, region_name, json_data=resource_data, headers=headers
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def delete_fhir_resource(
+@_with_region
+async def delete_fhir_resource(
     datastore_id: str,
     resource_type: str,
     resource_id: str,
@@ -667,26 +1212,21 @@ def delete_fhir_resource(
     """
     mutation_check()
 
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR resource
     url = f'{endpoint}{resource_type}/{resource_id}'
 
     # Add conditional delete header if specified
-    headers = {}
-    if if_match:
-        headers['If-Match'] = if_match
+    headers = _drop_empty({'If-Match': if_match})
 
-    return _make_fhir_request('DELETE', url, region_name, headers=headers)
+    return await _make_fhir_request('DELETE', url, region_name, headers=headers)
 
 
-@mcp.tool()
 @handle_exceptions
-def tag_resource(
+@_with_region
+async def tag_resource(
     resource_arn: str, tags: List[Dict[str, str]], region_name: Optional[str] = None
 ) -> Dict[str, Any]:
     """Add tags to a HealthLake resource.
@@ -701,17 +1241,16 @@ def tag_resource(
     """
     mutation_check()
 
-    client = get_healthlake_client(region_name)
-
-    tag_objects = [Tag(**tag).model_dump(by_alias=True) for tag in tags]
-
-    response = client.tag_resource(ResourceARN=resource_arn, Tags=tag_objects)
+    response = await _call_healthlake(
+        region_name, 'tag_resource', ResourceARN=resource_arn, Tags=tags_to_aws(tags)
+    )
+    _invalidate_cached(resource_arn)
     return response
 
 
-@mcp.tool()
 @handle_exceptions
-def untag_resource(
+@_with_region
+async def untag_resource(
     resource_arn: str, tag_keys: List[str], region_name: Optional[str] = None
 ) -> Dict[str, Any]:
     """Remove tags from a HealthLake resource.
@@ -726,15 +1265,18 @@ def untag_resource(
     """
     mutation_check()
 
-    client = get_healthlake_client(region_name)
-
-    response = client.untag_resource(ResourceARN=resource_arn, TagKeys=tag_keys)
+    response = await _call_healthlake(
+        region_name, 'untag_resource', ResourceARN=resource_arn, TagKeys=tag_keys
+    )
+    _invalidate_cached(resource_arn)
     return response
 
 
-@mcp.tool()
 @handle_exceptions
-def list_tags_for_resource(resource_arn: str, region_name: Optional[str] = None) -> Dict[str, Any]:
+@_with_region
+async def list_tags_for_resource(
+    resource_arn: str, region_name: Optional[str] = None
+) -> Dict[str, Any]:
     """List tags for a HealthLake resource.
 
     Args:
@@ -744,18 +1286,16 @@ def list_tags_for_resource(resource_arn: str, region_name: Optional[str] = None)
     Returns:
         Dict containing the resource tags
     """
-    client = get_healthlake_client(region_name)
-
-    response = client.list_tags_for_resource(ResourceARN=resource_arn)
-    return response
+    return await _cached_call(region_name, 'list_tags_for_resource', ResourceARN=resource_arn)
 
 
-@mcp.tool()
 @handle_exceptions
-def create_fhir_bundle(
+@_with_region
+async def create_fhir_bundle(
     datastore_id: str,
     bundle_resources: List[Dict[str, Any]],
     bundle_type: str = 'transaction',
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
     region_name: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Create a FHIR Bundle with multiple resources for batch processing using HealthLake FHIR API.
@@ -764,6 +1304,11 @@ def create_fhir_bundle(
         datastore_id: The AWS-generated ID for the datastore
         bundle_resources: List of FHIR resources to include in the bundle
         bundle_type: Type of bundle (transaction, batch, collection, etc.)
+        chunk_size: Maximum entries per request for batch bundles; larger batches are split
+            and sent concurrently, with the responses merged in order. Entries of a chunk
+            that fails, or whose response has the wrong number of entries, get an error
+            response with an OperationOutcome. Transaction bundles
+            are always sent as one request so they stay atomic.
         region_name: AWS region name (defaults to AWS_REGION env var or us-west-2)
 
     Returns:
@@ -771,44 +1316,56 @@ def create_fhir_bundle(
     """
     mutation_check()
 
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
-    # Create FHIR Bundle structure
-    bundle = {
-        'resourceType': 'Bundle',
-        'id': str(uuid.uuid4()),
-        'type': bundle_type,
-        'timestamp': datetime.utcnow().isoformat() + 'Z',
-        'entry': [],
-    }
-
-    # Add resources to bundle
-    for resource in bundle_resources:
-        entry = {'resource': resource}
-
-        # Add request information for transaction/batch bundles
-        if bundle_type in ['transaction', 'batch']:
-            resource_type = resource.get('resourceType', '')
-            if 'id' in resource:
-                entry['request'] = {'method': 'PUT', 'url': f'{resource_type}/{resource["id"]}'}
-            else:
-                entry['request'] = {'method': 'POST', 'url': resource_type}
-
-        bundle['entry'].append(entry)
+    if chunk_size < 1:
+        raise ValueError(f'chunk_size must be at least 1, got {chunk_size}')
 
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Send bundle to HealthLake
     url = f'{endpoint}'
 
-    return _make_fhir_request('POST', url, region_name, json_data=bundle)
+    if bundle_type != 'batch' or len(bundle_resources) <= chunk_size:
+        bundle = _build_bundle(bundle_resources, bundle_type)
+        return await _make_fhir_request('POST', url, region_name, json_data=bundle)
+
+    # Batch entries are processed independently, so a large batch can be split. A failed
+    # chunk must not hide the responses of chunks that were written, so every chunk's
+    # outcome is collected and failures are reported per entry.
+    chunks = [
+        bundle_resources[i : i + chunk_size] for i in range(0, len(bundle_resources), chunk_size)
+    ]
+    responses = await asyncio.gather(
+        *(
+            _make_fhir_request(
+                'POST', url, region_name, json_data=_build_bundle(chunk, bundle_type)
+            )
+            for chunk in chunks
+        ),
+        return_exceptions=True,
+    )
+
+    entries = []
+    for chunk, response in zip(chunks, responses):
+        if isinstance(response, BaseException) and not isinstance(response, Exception):
+            raise response
+        # A response without one entry per request can't be matched back to its resources
+        if not isinstance(response, Exception) and len(response.get('entry', [])) != len(chunk):
+            response = Exception(
+                f'Expected {len(chunk)} batch-response entries, '
+                f'got {len(response.get("entry", []))}'
+            )
+        if isinstance(response, Exception):
+            logger.error('Batch chunk of {} entries failed: {}', len(chunk), response)
+            entries.extend(_failed_batch_entries(len(chunk), response))
+        else:
+            entries.extend(response['entry'])
+    return {'resourceType': 'Bundle', 'type': 'batch-response', 'entry': entries}
 
 
-@mcp.tool()
 @handle_exceptions
-def search_fhir_resources_advanced(
+@_with_region
+async def search_fhir_resources_advanced(
     datastore_id: str,
     resource_type: str,
     search_parameters: Optional[Dict[str, Any]] = None,
@@ -833,9 +1390,6 @@ def search_fhir_resources_advanced(
     Returns:
         Dict containing the advanced search results as a FHIR Bundle
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Build query parameters
     params = {}
 
@@ -855,15 +1409,14 @@ def search_fhir_resources_advanced(
         params['_count'] = count
 
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR search
     url = f'{endpoint}{resource_type}'
 
-    return _make_fhir_request('GET', url, region_name, params=params)
+    return await _make_fhir_request('GET', url, region_name, params=params)
 
 
-@mcp.tool()
 @handle_exceptions
 def validate_fhir_resource(
     resource_data: Dict[str, Any], resource_type: Optional[str] = None
@@ -894,39 +1447,31 @@ def validate_fhir_resource(
             )
 
     # Check for required fields based on resource type
-    resource_type_to_check = resource_type or resource_data.get('resourceType')
-
-    if resource_type_to_check == 'Patient':
-        # Basic Patient validation
-        if 'name' not in resource_data and 'identifier' not in resource_data:
-            validation_result['warnings'].append(
-                "Patient should have either 'name' or 'identifier' field"
-            )
+    resource_type_to_check = resource_type or resource_data.get('resourceType') or ''
 
-    elif resource_type_to_check == 'Observation':
-        # Basic Observation validation
-        required_fields = ['status', 'code']
-        for field in required_fields:
-            if field not in resource_data:
-                validation_result['valid'] = False
-                validation_result['issues'].append(f"Missing required field: '{field}'")
-
-    elif resource_type_to_check == 'Condition':
-        # Basic Condition validation
-        if 'subject' not in resource_data:
+    for field in _REQUIRED_FIELDS.get(resource_type_to_check, ()):
+        if field not in resource_data:
             validation_result['valid'] = False
-            validation_result['issues'].append("Missing required field: 'subject'")
+            validation_result['issues'].append(f"Missing required field: '{field}'")
+
+    recommended_fields = _RECOMMENDED_FIELDS.get(resource_type_to_check)
+    if recommended_fields and resource_data.keys().isdisjoint(recommended_fields):
+        validation_result['warnings'].append(
+            f'{resource_type_to_check} should have either '
+            f'{" or ".join(repr(field) for field in recommended_fields)} field'
+        )
 
     # Check for common FHIR patterns
     if 'id' in resource_data:
         resource_id = resource_data['id']
-        if not isinstance(resource_id, str) or len(resource_id) == 0:
-            validation_result['issues'].append("Resource 'id' must be a non-empty string")
+        if not (isinstance(resource_id, str) and _FHIR_ID_RE.fullmatch(resource_id)):
+            validation_result['issues'].append(
+                "Resource 'id' must be 1-64 letters, digits, '-' or '.'"
+            )
 
     return validation_result
 
 
-@mcp.tool()
 @handle_exceptions
 def create_patient_template(
     family_name: str,
@@ -984,7 +1529,6 @@ def create_patient_template(
     return patient
 
 
-@mcp.tool()
 @handle_exceptions
 def create_observation_template(
     patient_reference: str,
@@ -1026,7 +1570,7 @@ def create_observation_template(
             {
                 'coding': [
                     {
-                        'system': 'http://terminology.hl7.org/CodeSystem/observation-category',
+                        'system': OBSERVATION_CATEGORY_SYSTEM,
                         'code': category_code,
                     }
                 ]
@@ -1039,18 +1583,15 @@ def create_observation_template(
     elif value_string:
         observation['valueString'] = value_string
 
-    # Add effective datetime
-    if effective_datetime:
-        observation['effectiveDateTime'] = effective_datetime
-    else:
-        observation['effectiveDateTime'] = datetime.utcnow().isoformat() + 'Z'
+    # Add effective datetime, defaulting to now
+    observation['effectiveDateTime'] = effective_datetime or _fhir_instant()
 
     return observation
 
 
-@mcp.tool()
 @handle_exceptions
-def get_fhir_resource_history(
+@_with_region
+async def get_fhir_resource_history(
     datastore_id: str,
     resource_type: str,
     resource_id: str,
@@ -1071,28 +1612,21 @@ def get_fhir_resource_history(
     Returns:
         Dict containing the resource version history as a FHIR Bundle
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR resource history
     url = f'{endpoint}{resource_type}/{resource_id}/_history'
 
     # Build query parameters
-    params = {}
-    if count:
-        params['_count'] = count
-    if since:
-        params['_since'] = since
+    params = _drop_empty({'_count': count, '_since': since})
 
-    return _make_fhir_request('GET', url, region_name, params=params)
+    return await _make_fhir_request('GET', url, region_name, params=params)
 
 
-@mcp.tool()
 @handle_exceptions
-def get_datastore_capabilities(
+@_with_region
+async def get_datastore_capabilities(
     datastore_id: str, region_name: Optional[str] = None
 ) -> Dict[str, Any]:
     """Get the FHIR capabilities statement for a datastore using HealthLake FHIR API.
@@ -1104,21 +1638,27 @@ def get_datastore_capabilities(
     Returns:
         Dict containing the FHIR CapabilityStatement
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
+    # The CapabilityStatement rarely changes, so it is cached for
+    # HEALTHLAKE_MCP_CAPABILITIES_TTL seconds
+    key = (region_name, datastore_id)
+    cached = _capabilities_cache.get(key)
+    if cached and time.monotonic() - cached[1] < _CAPABILITIES_CACHE_TTL:
+        return copy.deepcopy(cached[0])
 
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the capabilities statement
     url = f'{endpoint}metadata'
 
-    return _make_fhir_request('GET', url, region_name)
+    capabilities = await _make_fhir_request('GET', url, region_name)
+    _capabilities_cache[key] = (copy.deepcopy(capabilities), time.monotonic())
+    return capabilities
 
 
-@mcp.tool()
 @handle_exceptions
-def patch_fhir_resource(
+@_with_region
+async def patch_fhir_resource(
     datastore_id: str,
     resource_type: str,
     resource_id: str,
@@ -1143,11 +1683,8 @@ def patch_fhir_resource(
     """
     mutation_check()
 
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for the FHIR resource
     url = f'{endpoint}{resource_type}/{resource_id}'
@@ -1162,17 +1699,18 @@ def patch_fhir_resource(
     if if_match:
         headers['If-Match'] = if_match
 
-    return _make_fhir_request(
+    return await _make_fhir_request(
         'PATCH', url, region_name, json_data=patch_operations, headers=headers
     )
 
 
-@mcp.tool()
 @handle_exceptions
-def search_all_resources(
+@_with_region
+async def search_all_resources(
     datastore_id: str,
     query_parameters: Optional[Dict[str, str]] = None,
     count: Optional[int] = None,
+    columns: Optional[List[str]] = None,
     region_name: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Search across all resource types in a datastore using HealthLake FHIR API.
@@ -1181,14 +1719,13 @@ def search_all_resources(
         datastore_id: The AWS-generated ID for the datastore
         query_parameters: Optional dictionary of search parameters
         count: Optional number of results to return per page
+        columns: Optional resource fields (e.g. ["id", "birthDate"]) to return as one list
+            per field instead of the full Bundle
         region_name: AWS region name (defaults to AWS_REGION env var or us-west-2)
 
     Returns:
-        Dict containing the search results as a FHIR Bundle
+        Dict containing the search results as a FHIR Bundle, or as columns if requested
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Build query parameters
     params = {}
     if query_parameters:
@@ -1197,17 +1734,18 @@ def search_all_resources(
         params['_count'] = count
 
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Search across all resources using the base URL
     url = f'{endpoint}'
 
-    return _make_fhir_request('GET', url, region_name, params=params)
+    bundle = await _make_fhir_request('GET', url, region_name, params=params)
+    return _bundle_to_columns(bundle, columns) if columns else bundle
 
 
-@mcp.tool()
 @handle_exceptions
-def validate_fhir_resource_against_profile(
+@_with_region
+async def validate_fhir_resource_against_profile(
     datastore_id: str,
     resource_data: Dict[str, Any],
     profile_url: Optional[str] = None,
@@ -1224,32 +1762,30 @@ def validate_fhir_resource_against_profile(
     Returns:
         Dict containing the validation results as an OperationOutcome
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for validation
     resource_type = resource_data.get('resourceType', '')
     url = f'{endpoint}{resource_type}/$validate'
 
     # Add profile parameter if specified
-    params = {}
-    if profile_url:
-        params['profile'] = profile_url
+    params = _drop_empty({'profile': profile_url})
 
-    return _make_fhir_request('POST', url, region_name, json_data=resource_data, params=params)
+    return await _make_fhir_request(
+        'POST', url, region_name, json_data=resource_data, params=params
+    )
 
 
-@mcp.tool()
 @handle_exceptions
-def get_fhir_resource_compartment(
+@_with_region
+async def get_fhir_resource_compartment(
     datastore_id: str,
     compartment_type: str,
     compartment_id: str,
     resource_type: Optional[str] = None,
     query_parameters: Optional[Dict[str, str]] = None,
+    columns: Optional[List[str]] = None,
     region_name: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Get resources from a FHIR compartment (e.g., Patient compartment).
@@ -1260,16 +1796,16 @@ def get_fhir_resource_compartment(
         compartment_id: The ID of the compartment resource
         resource_type: Optional specific resource type to search within compartment
         query_parameters: Optional dictionary of search parameters
+        columns: Optional resource fields (e.g. ["id", "effectiveDateTime"]) to return as
+            one list per field instead of the full Bundle
         region_name: AWS region name (defaults to AWS_REGION env var or us-west-2)
 
     Returns:
-        Dict containing the compartment search results as a FHIR Bundle
+        Dict containing the compartment search results as a FHIR Bundle, or as columns if
+        requested
     """
-    if not region_name:
-        region_name = os.getenv('AWS_REGION', 'us-west-2')
-
     # Get the datastore endpoint
-    endpoint = _get_fhir_endpoint(datastore_id, region_name)
+    endpoint = await _fhir_endpoint(datastore_id, region_name)
 
     # Construct the URL for compartment search
     if resource_type:
@@ -1277,11 +1813,58 @@ def get_fhir_resource_compartment(
     else:
         url = f'{endpoint}{compartment_type}/{compartment_id}/*'
 
-    return _make_fhir_request('GET', url, region_name, params=query_parameters)
+    bundle = await _make_fhir_request('GET', url, region_name, params=query_parameters)
+    return _bundle_to_columns(bundle, columns) if columns else bundle
+
+
+# Tools exposed by the server. They are registered from main() instead of with
+# @mcp.tool() decorators, so importing this module does not build every tool's schema.
+TOOLS = (
+    create_datastore,
+    delete_datastore,
+    describe_datastore,
+    list_datastores,
+    start_fhir_import_job,
+    start_fhir_export_job,
+    describe_fhir_import_job,
+    describe_fhir_export_job,
+    list_fhir_import_jobs,
+    list_fhir_export_jobs,
+    read_fhir_resource,
+    read_fhir_resources_bulk,
+    search_fhir_resources,
+    create_fhir_resource,
+    update_fhir_resource,
+    delete_fhir_resource,
+    tag_resource,
+    untag_resource,
+    list_tags_for_resource,
+    create_fhir_bundle,
+    search_fhir_resources_advanced,
+    validate_fhir_resource,
+    create_patient_template,
+    create_observation_template,
+    get_fhir_resource_history,
+    get_datastore_capabilities,
+    patch_fhir_resource,
+    search_all_resources,
+    validate_fhir_resource_against_profile,
+    get_fhir_resource_compartment,
+)
+
+
+def register_tools() -> None:
+    """Register the server's tools with FastMCP."""
+    for tool in TOOLS:
+        mcp.tool()(tool)
 
 
 def main():
     """Main entry point for the HealthLake MCP server."""
+    register_tools()
+    # Build the default region's client before serving, so the first tool call does not
+    # load the service model on the event loop
+    get_healthlake_client()
     mcp.run()
 
 
@@ -0,0 +1,76 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared test fixtures and configuration."""
+
+import pytest
+from awslabs.healthlake_mcp_server.server import (
+    _capabilities_cache,
+    _clear_etag_cache,
+    _create_healthlake_client,
+    _endpoint_cache,
+    _get_boto3_session,
+    _get_signer,
+    _reload_config,
+    _response_cache,
+)
+from unittest.mock import MagicMock
+
+
+# describe_fhir_datastore response for the datastore the FHIR tool tests use
+DESCRIBE_DATASTORE_RESPONSE = {
+    'DatastoreProperties': {
+        'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/test-id/r4/'
+    }
+}
+
+
+@pytest.fixture(scope='session')
+def shared_healthlake_client():
+    """HealthLake client mock built once and reset before each test."""
+    return MagicMock()
+
+
+@pytest.fixture(autouse=True, scope='session')
+def stub_boto3_client(shared_healthlake_client):
+    """Make boto3.client return the shared client mock, so no test reaches AWS.
+
+    Tests that assert on how boto3.client is called patch it again themselves.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr('boto3.client', lambda *args, **kwargs: shared_healthlake_client)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_client_cache(shared_healthlake_client):
+    """Drop cached clients, sessions and responses so each test sees its own patched boto3."""
+    _create_healthlake_client.cache_clear()
+    _get_boto3_session.cache_clear()
+    _get_signer.cache_clear()
+    _endpoint_cache.clear()
+    _capabilities_cache.clear()
+    _response_cache.clear()
+    _clear_etag_cache()
+    shared_healthlake_client.reset_mock(return_value=True, side_effect=True)
+    yield
+    # Undo settings a test loaded from a patched environment
+    _reload_config()
+
+
+@pytest.fixture
+def mock_healthlake_client(shared_healthlake_client):
+    """The shared HealthLake client mock, describing the test datastore."""
+    shared_healthlake_client.describe_fhir_datastore.return_value = DESCRIBE_DATASTORE_RESPONSE
+    return shared_healthlake_client
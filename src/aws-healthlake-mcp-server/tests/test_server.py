@@ -12,77 +12,131 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import httpx
 import os
 import pytest
+import re
+import threading
+import time
+from awslabs.healthlake_mcp_server.common import mutation_check, tags_to_aws
 from awslabs.healthlake_mcp_server.server import (
+    TOOLS,
+    _etag_cache,
+    _FhirRequestError,
+    _get_signer,
+    _make_fhir_request,
+    _reload_config,
+    _response_cache,
+    _retry_delay,
+    _send_with_backoff,
     create_datastore,
     create_fhir_bundle,
     create_fhir_resource,
     create_observation_template,
     create_patient_template,
+    describe_datastore,
+    describe_fhir_import_job,
     get_datastore_capabilities,
     get_fhir_resource_history,
+    get_healthlake_client,
     list_datastores,
+    list_tags_for_resource,
+    main,
+    mcp,
     read_fhir_resource,
+    read_fhir_resources_bulk,
+    register_tools,
+    search_all_resources,
     search_fhir_resources_advanced,
+    tag_resource,
+    update_fhir_resource,
     validate_fhir_resource,
 )
-from moto import mock_aws
-from unittest.mock import MagicMock, patch
+from botocore.credentials import Credentials
+from botocore.exceptions import ClientError
+from unittest.mock import DEFAULT, AsyncMock, MagicMock, patch
 
 
-@pytest.fixture
-def aws_credentials():
-    """Mocked AWS Credentials for moto."""
-    os.environ['AWS_DEFAULT_REGION'] = 'us-west-2'
+# FHIR resource returned by the mocked HealthLake reads
+PATIENT = {'resourceType': 'Patient', 'id': 'test-id'}
 
 
 class TestHealthLakeServer:
     """Test class for HealthLake MCP server functionality."""
 
-    @mock_aws
-    def test_create_datastore(self, aws_credentials):
+    async def test_create_datastore(self, mock_healthlake_client):
         """Test creating a datastore."""
-        with patch('boto3.client') as mock_client:
-            mock_client_instance = MagicMock()
-            mock_client.return_value = mock_client_instance
-            mock_client_instance.create_fhir_datastore.return_value = {
-                'DatastoreId': 'test-datastore-id',
-                'DatastoreArn': 'arn:aws:healthlake:us-west-2:123456789012:datastore/fhir/test-datastore-id',
-            }
+        mock_healthlake_client.create_fhir_datastore.return_value = {
+            'DatastoreId': 'test-datastore-id',
+            'DatastoreArn': 'arn:aws:healthlake:us-west-2:123456789012:datastore/fhir/test-datastore-id',
+        }
 
-            result = create_datastore(datastore_type_version='R4', datastore_name='test-datastore')
+        result = await create_datastore(
+            datastore_type_version='R4', datastore_name='test-datastore'
+        )
 
-            assert result['DatastoreId'] == 'test-datastore-id'
-            mock_client_instance.create_fhir_datastore.assert_called_once()
+        assert result['DatastoreId'] == 'test-datastore-id'
+        mock_healthlake_client.create_fhir_datastore.assert_called_once_with(
+            DatastoreTypeVersion='R4', DatastoreName='test-datastore'
+        )
 
-    def test_read_fhir_resource(self, aws_credentials):
-        """Test reading a FHIR resource."""
-        with (
-            patch('boto3.client') as mock_client,
-            patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
-        ):
-            # Mock the describe_fhir_datastore call
-            mock_client_instance = MagicMock()
-            mock_client.return_value = mock_client_instance
-            mock_client_instance.describe_fhir_datastore.return_value = {
-                'DatastoreProperties': {
-                    'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/test-id/r4/'
-                }
-            }
+    @pytest.mark.parametrize(
+        'tool, kwargs, path, params',
+        [
+            (
+                read_fhir_resource,
+                {'resource_type': 'Patient', 'resource_id': 'test-patient-id'},
+                'Patient/test-patient-id',
+                None,
+            ),
+            (
+                search_fhir_resources_advanced,
+                {
+                    'resource_type': 'Patient',
+                    'search_parameters': {'name': 'Smith'},
+                    'include_parameters': ['Patient:general-practitioner'],
+                    'sort_parameters': ['family', 'given'],
+                    'count': 10,
+                },
+                'Patient',
+                {
+                    'name': 'Smith',
+                    '_include': ['Patient:general-practitioner'],
+                    '_sort': 'family,given',
+                    '_count': 10,
+                },
+            ),
+            (
+                get_fhir_resource_history,
+                {
+                    'resource_type': 'Patient',
+                    'resource_id': 'test-patient-id',
+                    'since': '2024-01-01',
+                },
+                'Patient/test-patient-id/_history',
+                {'_since': '2024-01-01'},
+            ),
+            (get_datastore_capabilities, {}, 'metadata', None),
+        ],
+    )
+    async def test_fhir_read_tools(self, mock_healthlake_client, tool, kwargs, path, params):
+        """Test that read-only FHIR tools GET the right URL on the datastore's endpoint."""
+        with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
+            mock_fhir_request.return_value = {'resourceType': 'Bundle', 'entry': []}
 
-            # Mock the FHIR request
-            mock_fhir_request.return_value = {'resourceType': 'Patient', 'id': 'test-id'}
+            result = await tool(datastore_id='test-datastore-id', **kwargs)
 
-            result = read_fhir_resource(
-                datastore_id='test-datastore-id',
-                resource_type='Patient',
-                resource_id='test-patient-id',
-            )
-
-            assert result['resourceType'] == 'Patient'
-            assert result['id'] == 'test-id'
-            mock_fhir_request.assert_called_once()
+        assert result == {'resourceType': 'Bundle', 'entry': []}
+        mock_healthlake_client.describe_fhir_datastore.assert_called_once_with(
+            DatastoreId='test-datastore-id'
+        )
+        mock_fhir_request.assert_called_once()
+        assert mock_fhir_request.call_args.args[:2] == (
+            'GET',
+            f'https://healthlake.us-west-2.amazonaws.com/datastore/test-id/r4/{path}',
+        )
+        assert mock_fhir_request.call_args.kwargs.get('params') == params
 
     def test_validate_fhir_resource_valid_patient(self):
         """Test validating a valid patient FHIR resource."""
@@ -129,13 +183,17 @@ class TestHealthLakeServer:
             email='john.doe@example.com',
         )
 
-        assert result['resourceType'] == 'Patient'
-        assert result['name'][0]['family'] == 'Doe'
-        assert result['name'][0]['given'] == ['John', 'William']
-        assert result['gender'] == 'male'
-        assert result['birthDate'] == '1990-01-01'
-        assert len(result['identifier']) == 1
-        assert len(result['telecom']) == 2
+        assert result == {
+            'resourceType': 'Patient',
+            'name': [{'family': 'Doe', 'given': ['John', 'William']}],
+            'gender': 'male',
+            'birthDate': '1990-01-01',
+            'identifier': [{'system': 'http://hospital.smarthealthit.org', 'value': '12345'}],
+            'telecom': [
+                {'system': 'phone', 'value': '+1-555-123-4567', 'use': 'home'},
+                {'system': 'email', 'value': 'john.doe@example.com'},
+            ],
+        }
 
     def test_create_observation_template(self):
         """Test creating an observation template."""
@@ -154,59 +212,36 @@ class TestHealthLakeServer:
             category_code='vital-signs',
         )
 
-        assert result['resourceType'] == 'Observation'
-        assert result['subject']['reference'] == 'Patient/test-patient-id'
-        assert result['code']['coding'][0]['system'] == 'http://loinc.org'
-        assert result['code']['coding'][0]['code'] == '8867-4'
-        assert result['valueQuantity']['value'] == 72
-        assert result['category'][0]['coding'][0]['code'] == 'vital-signs'
-
-    def test_search_fhir_resources_advanced(self, aws_credentials):
-        """Test advanced FHIR resource search."""
-        with (
-            patch('boto3.client') as mock_client,
-            patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
-        ):
-            # Mock the describe_fhir_datastore call
-            mock_client_instance = MagicMock()
-            mock_client.return_value = mock_client_instance
-            mock_client_instance.describe_fhir_datastore.return_value = {
-                'DatastoreProperties': {
-                    'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/test-id/r4/'
+        assert result == {
+            'resourceType': 'Observation',
+            'status': 'final',
+            'code': {
+                'coding': [
+                    {'system': 'http://loinc.org', 'code': '8867-4', 'display': 'Heart rate'}
+                ]
+            },
+            'subject': {'reference': 'Patient/test-patient-id'},
+            'category': [
+                {
+                    'coding': [
+                        {
+                            'system': 'http://terminology.hl7.org/CodeSystem/observation-category',
+                            'code': 'vital-signs',
+                        }
+                    ]
                 }
-            }
-
-            # Mock the FHIR request
-            mock_fhir_request.return_value = {'resourceType': 'Bundle', 'entry': []}
-
-            result = search_fhir_resources_advanced(
-                datastore_id='test-datastore-id',
-                resource_type='Patient',
-                search_parameters={'name': 'Smith'},
-                include_parameters=['Patient:general-practitioner'],
-                sort_parameters=['family', 'given'],
-                count=10,
-            )
-
-            assert result['resourceType'] == 'Bundle'
-            mock_fhir_request.assert_called_once()
+            ],
+            'valueQuantity': {
+                'value': 72,
+                'unit': 'beats/min',
+                'system': 'http://unitsofmeasure.org',
+            },
+            'effectiveDateTime': '2023-01-01T10:00:00Z',
+        }
 
-    @patch.dict(os.environ, {'HEALTHLAKE_MCP_READONLY': 'false'})
-    def test_create_fhir_bundle(self, aws_credentials):
+    async def test_create_fhir_bundle(self, mock_healthlake_client):
         """Test creating a FHIR bundle."""
-        with (
-            patch('boto3.client') as mock_client,
-            patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
-        ):
-            # Mock the describe_fhir_datastore call
-            mock_client_instance = MagicMock()
-            mock_client.return_value = mock_client_instance
-            mock_client_instance.describe_fhir_datastore.return_value = {
-                'DatastoreProperties': {
-                    'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/test-id/r4/'
-                }
-            }
-
+        with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
             # Mock the FHIR request
             mock_fhir_request.return_value = {'resourceType': 'Bundle', 'id': 'test-bundle-id'}
 
@@ -219,7 +254,7 @@ class TestHealthLakeServer:
                 }
             ]
 
-            result = create_fhir_bundle(
+            result = await create_fhir_bundle(
                 datastore_id='test-datastore-id',
                 bundle_resources=bundle_resources,
                 bundle_type='transaction',
@@ -229,123 +264,718 @@ class TestHealthLakeServer:
             assert result['id'] == 'test-bundle-id'
             mock_fhir_request.assert_called_once()
 
-    def test_get_fhir_resource_history(self, aws_credentials):
-        """Test getting FHIR resource history."""
-        with (
-            patch('boto3.client') as mock_client,
-            patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
+
+async def test_list_datastores(mock_healthlake_client):
+    """Test listing datastores."""
+    with patch('boto3.client', return_value=mock_healthlake_client) as mock_client:
+        mock_healthlake_client.list_fhir_datastores.return_value = {'DatastorePropertiesList': []}
+
+        result = await list_datastores()
+
+        mock_client.assert_called_once()
+        mock_healthlake_client.list_fhir_datastores.assert_called_once_with()
+        assert result == {'DatastorePropertiesList': []}
+
+
+async def test_create_fhir_resource(mock_healthlake_client):
+    """Test creating a FHIR resource."""
+    with (
+        patch('boto3.client', return_value=mock_healthlake_client) as mock_client,
+        patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
+    ):
+        # Mock the FHIR request
+        mock_fhir_request.return_value = {'resourceType': 'Patient', 'id': 'created-id'}
+
+        resource_data = {'resourceType': 'Patient', 'name': [{'family': 'Doe', 'given': ['John']}]}
+
+        result = await create_fhir_resource(
+            datastore_id='123', resource_type='Patient', resource_data=resource_data
+        )
+
+        mock_client.assert_called_once()
+        mock_healthlake_client.describe_fhir_datastore.assert_called_once_with(DatastoreId='123')
+        assert result == {'resourceType': 'Patient', 'id': 'created-id'}
+
+
+async def test_client_error_is_wrapped(mock_healthlake_client):
+    """Test that AWS ClientErrors raised from async tools are re-raised with context."""
+    mock_healthlake_client.describe_fhir_datastore.side_effect = ClientError(
+        {'Error': {'Code': 'ResourceNotFoundException', 'Message': 'Datastore not found'}},
+        'DescribeFHIRDatastore',
+    )
+
+    with pytest.raises(Exception, match=r'AWS HealthLake Error \(ResourceNotFoundException\)'):
+        await describe_datastore(datastore_id='123')
+
+
+def test_healthlake_client_is_cached_per_region():
+    """Test that HealthLake clients are reused per region."""
+    with patch('boto3.client') as mock_client:
+        mock_client.side_effect = lambda *args, **kwargs: MagicMock()
+
+        first = get_healthlake_client('us-east-1')
+        second = get_healthlake_client('us-east-1')
+        other = get_healthlake_client('eu-west-1')
+
+        assert first is second
+        assert other is not first
+        assert mock_client.call_count == 2
+
+
+def test_healthlake_client_pool_size():
+    """Test that the client connection pool size defaults to 50 and honors the env var."""
+    with patch('boto3.client') as mock_client:
+        get_healthlake_client('us-east-1')
+        with patch.dict(os.environ, {'HEALTHLAKE_MCP_MAX_POOL': '8'}):
+            get_healthlake_client('eu-west-1')
+
+        default_config = mock_client.call_args_list[0].kwargs['config']
+        custom_config = mock_client.call_args_list[1].kwargs['config']
+        assert default_config.max_pool_connections == 50
+        assert default_config.tcp_keepalive is True
+        assert custom_config.max_pool_connections == 8
+
+
+async def test_make_fhir_request_uses_shared_client():
+    """Test that FHIR requests are signed and sent over the shared HTTP client."""
+    with (
+        patch('boto3.Session') as mock_session,
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
+    ):
+        mock_session.return_value.get_credentials.return_value = Credentials('AKID', 'SECRET')
+        mock_http_client.request = AsyncMock(return_value=httpx.Response(200, json=PATIENT))
+
+        result = await _make_fhir_request(
+            'GET',
+            'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/Patient',
+            'us-west-2',
+            params={'name': 'Smith Jr', '_include': ['Patient:organization', 'Patient:link']},
+        )
+
+        assert result == PATIENT
+        call_kwargs = mock_http_client.request.call_args.kwargs
+        assert call_kwargs['headers']['Authorization'].startswith('AWS4-HMAC-SHA256')
+        # The query string is part of the signed URL, with lists sent as repeated keys
+        assert call_kwargs['url'].endswith(
+            'Patient?name=Smith%20Jr&_include=Patient%3Aorganization&_include=Patient%3Alink'
+        )
+
+        # The boto3 session is reused for subsequent requests
+        await _make_fhir_request(
+            'GET',
+            'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/Patient/test-id',
+            'us-west-2',
+        )
+        mock_session.assert_called_once()
+        assert _get_signer.cache_info().currsize == 1
+
+
+async def test_make_fhir_request_operation_outcome_error():
+    """Test that FHIR OperationOutcome errors are reported with their issues."""
+    with (
+        patch('boto3.Session') as mock_session,
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
+    ):
+        mock_session.return_value.get_credentials.return_value = Credentials('AKID', 'SECRET')
+        mock_http_client.request = AsyncMock(
+            return_value=httpx.Response(
+                400,
+                json={
+                    'resourceType': 'OperationOutcome',
+                    'issue': [
+                        {'severity': 'error', 'code': 'invalid', 'diagnostics': 'Bad id'},
+                        {'code': 'required', 'details': {'text': 'Missing name'}},
+                    ],
+                },
+            )
+        )
+
+        with pytest.raises(
+            Exception,
+            match='FHIR Operation Failed: ERROR: invalid - Bad id; ERROR: required - Missing name',
         ):
-            # Mock the describe_fhir_datastore call
-            mock_client_instance = MagicMock()
-            mock_client.return_value = mock_client_instance
-            mock_client_instance.describe_fhir_datastore.return_value = {
-                'DatastoreProperties': {
-                    'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/test-id/r4/'
-                }
+            await _make_fhir_request(
+                'GET',
+                'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/Patient/x',
+                'us-west-2',
+            )
+
+
+async def test_send_with_backoff_retries_throttling():
+    """Test that throttled FHIR requests are retried with backoff."""
+    with (
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
+        patch('awslabs.healthlake_mcp_server.server.asyncio.sleep') as mock_sleep,
+    ):
+        throttled = httpx.Response(429, headers={'Retry-After': '2'})
+        ok = httpx.Response(200)
+        mock_http_client.request = AsyncMock(side_effect=[throttled, ok])
+
+        response = await _send_with_backoff('POST', url='https://example.com')
+
+        assert response is ok
+        mock_sleep.assert_awaited_once_with(2.0)
+
+
+async def test_send_with_backoff_does_not_retry_non_idempotent_server_errors():
+    """Test that a POST failing with a 500 is not retried."""
+    with (
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
+        patch('awslabs.healthlake_mcp_server.server.asyncio.sleep') as mock_sleep,
+    ):
+        mock_http_client.request = AsyncMock(return_value=httpx.Response(500))
+
+        response = await _send_with_backoff('POST', url='https://example.com')
+
+        assert response.status_code == 500
+        mock_http_client.request.assert_awaited_once()
+        mock_sleep.assert_not_called()
+
+
+async def test_send_with_backoff_retries_unsent_requests():
+    """Test that a POST is retried when the connection fails, but not on a read error."""
+    with (
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
+        patch('awslabs.healthlake_mcp_server.server.asyncio.sleep') as mock_sleep,
+    ):
+        mock_http_client.request = AsyncMock(
+            side_effect=[
+                httpx.ConnectError('refused'),
+                httpx.ConnectTimeout('timed out'),
+                httpx.Response(200),
+            ]
+        )
+
+        response = await _send_with_backoff('POST', url='https://example.com')
+
+        assert response.status_code == 200
+        assert mock_http_client.request.await_count == 3
+        assert mock_sleep.await_count == 2
+
+        mock_http_client.request = AsyncMock(side_effect=httpx.ReadError('reset'))
+        with pytest.raises(httpx.ReadError):
+            await _send_with_backoff('POST', url='https://example.com')
+        mock_http_client.request.assert_awaited_once()
+
+
+async def test_fhir_endpoint_is_cached(mock_healthlake_client):
+    """Test that the datastore endpoint is only looked up once for repeated FHIR calls."""
+    with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
+        mock_fhir_request.return_value = PATIENT
+
+        await read_fhir_resource(datastore_id='123', resource_type='Patient', resource_id='1')
+        await read_fhir_resource(datastore_id='123', resource_type='Patient', resource_id='2')
+
+        mock_healthlake_client.describe_fhir_datastore.assert_called_once_with(DatastoreId='123')
+        assert mock_fhir_request.call_count == 2
+
+
+async def test_response_cache(monkeypatch, mock_healthlake_client):
+    """Test that read-only responses are cached when HEALTHLAKE_MCP_CACHE_TTL is set."""
+    mock_healthlake_client.describe_fhir_datastore.return_value = {'DatastoreProperties': {}}
+    mock_healthlake_client.list_tags_for_resource.return_value = {'Tags': []}
+    mock_healthlake_client.describe_fhir_import_job.return_value = {
+        'ImportJobProperties': {'JobStatus': 'IN_PROGRESS'}
+    }
+
+    # Disabled by default
+    await describe_datastore(datastore_id='123')
+    await describe_datastore(datastore_id='123')
+    assert mock_healthlake_client.describe_fhir_datastore.call_count == 2
+
+    monkeypatch.setenv('HEALTHLAKE_MCP_CACHE_TTL', '60')
+    _reload_config()
+    mock_healthlake_client.describe_fhir_datastore.reset_mock()
+    first = await describe_datastore(datastore_id='123')
+    first['DatastoreProperties']['DatastoreName'] = 'changed'
+    assert await describe_datastore(datastore_id='123') == {'DatastoreProperties': {}}
+    mock_healthlake_client.describe_fhir_datastore.assert_called_once_with(DatastoreId='123')
+
+    # Datastores that are still being created are never cached
+    mock_healthlake_client.describe_fhir_datastore.return_value = {
+        'DatastoreProperties': {'DatastoreStatus': 'CREATING'}
+    }
+    await describe_datastore(datastore_id='456')
+    await describe_datastore(datastore_id='456')
+    assert mock_healthlake_client.describe_fhir_datastore.call_count == 3
+
+    # Running jobs are never cached
+    await describe_fhir_import_job(datastore_id='123', job_id='job')
+    await describe_fhir_import_job(datastore_id='123', job_id='job')
+    assert mock_healthlake_client.describe_fhir_import_job.call_count == 2
+
+    # Tagging a resource invalidates its cached tags
+    arn = 'arn:aws:healthlake:us-west-2:123456789012:datastore/fhir/123'
+    await list_tags_for_resource(resource_arn=arn)
+    await list_tags_for_resource(resource_arn=arn)
+    await tag_resource(resource_arn=arn, tags=[{'Key': 'env', 'Value': 'test'}])
+    await list_tags_for_resource(resource_arn=arn)
+    assert mock_healthlake_client.list_tags_for_resource.call_count == 2
+
+
+async def test_response_cache_is_bounded(monkeypatch, mock_healthlake_client):
+    """Test that the response cache evicts its oldest entries and drops expired ones."""
+    mock_healthlake_client.meta.region_name = 'us-west-2'
+    mock_healthlake_client.describe_fhir_import_job.return_value = {
+        'ImportJobProperties': {'JobStatus': 'COMPLETED'}
+    }
+    monkeypatch.setenv('HEALTHLAKE_MCP_CACHE_TTL', '60')
+    _reload_config()
+
+    with patch('awslabs.healthlake_mcp_server.server.RESPONSE_CACHE_SIZE', 3):
+        for job_id in ['a', 'b', 'c', 'd']:
+            await describe_fhir_import_job(datastore_id='123', job_id=job_id)
+        assert [dict(key[2])['JobId'] for key in _response_cache] == ['b', 'c', 'd']
+
+        # Age the cached entries past the TTL
+        for key, (response, fetched) in _response_cache.items():
+            _response_cache[key] = (response, fetched - 60)
+        await describe_fhir_import_job(datastore_id='123', job_id='e')
+        assert [dict(key[2])['JobId'] for key in _response_cache] == ['e']
+
+
+async def test_read_fhir_resources_bulk(mock_healthlake_client):
+    """Test that bulk reads return results in order and report per-item errors."""
+    endpoint = 'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/'
+    with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
+        mock_healthlake_client.describe_fhir_datastore.return_value = {
+            'DatastoreProperties': {'DatastoreEndpoint': endpoint}
+        }
+
+        async def fake_request(method, url, region_name):
+            if url.endswith('/missing'):
+                raise Exception('FHIR Operation Failed: ERROR: not-found')
+            return {'resourceType': 'Patient', 'id': url.rsplit('/', 1)[1]}
+
+        mock_fhir_request.side_effect = fake_request
+
+        result = await read_fhir_resources_bulk(
+            datastore_id='123',
+            items=[
+                {'resource_type': 'Patient', 'resource_id': '1'},
+                {'resource_type': 'Patient', 'resource_id': 'missing'},
+                {'resource_type': 'Patient', 'resource_id': '2'},
+                {'resource_type': 'Patient'},
+                {'resource_type': 'Patient', 'resource_id': 'missing', 'error': 'stale'},
+                'Patient/2',
+            ],
+        )
+
+        assert result[0] == {'resourceType': 'Patient', 'id': '1'}
+        assert result[1]['error'] == 'FHIR Operation Failed: ERROR: not-found'
+        assert result[1]['resource_id'] == 'missing'
+        assert result[2] == {'resourceType': 'Patient', 'id': '2'}
+        assert result[3] == {'error': "'resource_id'", 'resource_type': 'Patient'}
+        assert result[4]['error'] == 'FHIR Operation Failed: ERROR: not-found'
+        assert result[5]['item'] == 'Patient/2'
+        assert 'error' in result[5]
+        mock_healthlake_client.describe_fhir_datastore.assert_called_once_with(DatastoreId='123')
+
+
+async def test_list_datastores_fetch_all(mock_healthlake_client):
+    """Test that fetch_all follows NextToken and merges every page."""
+    mock_healthlake_client.list_fhir_datastores.side_effect = [
+        {'DatastorePropertiesList': [{'DatastoreId': '1'}], 'NextToken': 'page-2'},
+        {'DatastorePropertiesList': [{'DatastoreId': '2'}]},
+    ]
+
+    result = await list_datastores(max_results=1, fetch_all=True)
+
+    assert result == {'DatastorePropertiesList': [{'DatastoreId': '1'}, {'DatastoreId': '2'}]}
+    mock_healthlake_client.list_fhir_datastores.assert_called_with(
+        MaxResults=1, NextToken='page-2'
+    )
+
+
+async def test_register_tools():
+    """Test that every tool is registered with FastMCP when the server starts."""
+    register_tools()
+
+    registered = {tool.name for tool in await mcp.list_tools()}
+    assert registered == {tool.__name__ for tool in TOOLS}
+    assert 'read_fhir_resource' in registered
+
+
+def test_retry_delay_uses_decorrelated_jitter():
+    """Test that retry delays grow from the previous delay and respect the cap."""
+    for _ in range(100):
+        assert 1.0 <= _retry_delay(4.0) <= 12.0
+        assert _retry_delay(100.0) <= 20.0
+
+    assert _retry_delay(1.0, httpx.Response(429, headers={'Retry-After': '60'})) == 20.0
+
+
+def test_main_prewarms_default_client():
+    """Test that main() builds the default HealthLake client before serving."""
+    with patch.multiple(
+        'awslabs.healthlake_mcp_server.server',
+        get_healthlake_client=DEFAULT,
+        register_tools=DEFAULT,
+        mcp=DEFAULT,
+    ) as mocks:
+        main()
+
+        mocks['register_tools'].assert_called_once_with()
+        mocks['get_healthlake_client'].assert_called_once_with()
+        mocks['mcp'].run.assert_called_once()
+
+
+async def test_create_fhir_bundle_splits_large_batches(mock_healthlake_client):
+    """Test that large batch bundles are sent in chunks and the responses merged in order."""
+    with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
+
+        async def fake_request(method, url, region_name, json_data):
+            return {
+                'resourceType': 'Bundle',
+                'type': 'batch-response',
+                'entry': [
+                    {'response': {'location': e['request']['url']}} for e in json_data['entry']
+                ],
             }
 
-            # Mock the FHIR request
-            mock_fhir_request.return_value = {'resourceType': 'Bundle', 'entry': []}
+        mock_fhir_request.side_effect = fake_request
+        resources = [{'resourceType': 'Patient', 'id': str(i)} for i in range(5)]
 
-            result = get_fhir_resource_history(
-                datastore_id='test-datastore-id',
-                resource_type='Patient',
-                resource_id='test-patient-id',
-            )
+        result = await create_fhir_bundle(
+            datastore_id='123', bundle_resources=resources, bundle_type='batch', chunk_size=2
+        )
 
-            assert result['resourceType'] == 'Bundle'
-            mock_fhir_request.assert_called_once()
+        assert mock_fhir_request.call_count == 3
+        bundle = mock_fhir_request.call_args.kwargs['json_data']
+        assert re.fullmatch(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z', bundle['timestamp'])
+        assert [e['response']['location'] for e in result['entry']] == [
+            f'Patient/{i}' for i in range(5)
+        ]
+
+        # Transactions must stay atomic, so they are never split
+        mock_fhir_request.reset_mock()
+        await create_fhir_bundle(
+            datastore_id='123', bundle_resources=resources, bundle_type='transaction', chunk_size=2
+        )
+        mock_fhir_request.assert_called_once()
 
-    def test_get_datastore_capabilities(self, aws_credentials):
-        """Test getting datastore capabilities."""
-        with (
-            patch('boto3.client') as mock_client,
-            patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
-        ):
-            # Mock the describe_fhir_datastore call
-            mock_client_instance = MagicMock()
-            mock_client.return_value = mock_client_instance
-            mock_client_instance.describe_fhir_datastore.return_value = {
+
+async def test_create_fhir_bundle_reports_failed_chunks(mock_healthlake_client):
+    """Test that a failed batch chunk is reported per entry without losing the others."""
+
+    async def fake_request(method, url, region_name, json_data):
+        if json_data['entry'][0]['resource']['id'] == '2':
+            raise _FhirRequestError('HTTP 400: bad chunk', 400)
+        return {
+            'resourceType': 'Bundle',
+            'type': 'batch-response',
+            'entry': [{'response': {'status': '201'}} for _ in json_data['entry']],
+        }
+
+    resources = [{'resourceType': 'Patient', 'id': str(i)} for i in range(5)]
+    with patch(
+        'awslabs.healthlake_mcp_server.server._make_fhir_request', side_effect=fake_request
+    ):
+        result = await create_fhir_bundle(
+            datastore_id='123', bundle_resources=resources, bundle_type='batch', chunk_size=2
+        )
+
+    assert [e['response']['status'] for e in result['entry']] == [
+        '201',
+        '201',
+        '400',
+        '400',
+        '201',
+    ]
+    outcome = result['entry'][2]['response']['outcome']
+    assert outcome['resourceType'] == 'OperationOutcome'
+    assert outcome['issue'][0]['diagnostics'] == 'HTTP 400: bad chunk'
+
+    with pytest.raises(ValueError, match='chunk_size must be at least 1'):
+        await create_fhir_bundle(
+            datastore_id='123', bundle_resources=resources, bundle_type='batch', chunk_size=0
+        )
+
+
+async def test_create_fhir_bundle_reports_mismatched_chunks(mock_healthlake_client):
+    """Test that a chunk answered without one entry per request is reported as failed."""
+
+    async def fake_request(method, url, region_name, json_data):
+        first_id = json_data['entry'][0]['resource']['id']
+        if first_id == '0':
+            return {'status': 'success', 'statusCode': 200}
+        entries = [{'response': {'status': '201'}} for _ in json_data['entry']]
+        return {'resourceType': 'Bundle', 'entry': entries[1:] if first_id == '2' else entries}
+
+    resources = [{'resourceType': 'Patient', 'id': str(i)} for i in range(5)]
+    with patch(
+        'awslabs.healthlake_mcp_server.server._make_fhir_request', side_effect=fake_request
+    ):
+        result = await create_fhir_bundle(
+            datastore_id='123', bundle_resources=resources, bundle_type='batch', chunk_size=2
+        )
+
+    assert [e['response']['status'] for e in result['entry']] == [
+        '500',
+        '500',
+        '500',
+        '500',
+        '201',
+    ]
+    diagnostics = result['entry'][2]['response']['outcome']['issue'][0]['diagnostics']
+    assert diagnostics == 'Expected 2 batch-response entries, got 1'
+
+
+async def test_fhir_write_ids_do_not_mutate_input(mock_healthlake_client):
+    """Test that create drops and update adds the resource id without changing the caller's dict."""
+    with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
+        with_id = {'resourceType': 'Patient', 'id': 'client-id'}
+        await create_fhir_resource(
+            datastore_id='123', resource_type='Patient', resource_data=with_id
+        )
+        assert mock_fhir_request.call_args.kwargs['json_data'] == {'resourceType': 'Patient'}
+        assert with_id == {'resourceType': 'Patient', 'id': 'client-id'}
+
+        without_id = {'resourceType': 'Patient'}
+        await update_fhir_resource(
+            datastore_id='123',
+            resource_type='Patient',
+            resource_id='p1',
+            resource_data=without_id,
+        )
+        assert mock_fhir_request.call_args.kwargs['json_data'] == {
+            'resourceType': 'Patient',
+            'id': 'p1',
+        }
+        assert without_id == {'resourceType': 'Patient'}
+
+
+async def test_boto3_calls_run_on_worker_pool(mock_healthlake_client):
+    """Test that blocking boto3 calls run on the server's worker threads."""
+    mock_healthlake_client.describe_fhir_datastore.side_effect = lambda **kwargs: {
+        'Thread': threading.current_thread().name
+    }
+
+    result = await describe_datastore(datastore_id='123')
+
+    assert result['Thread'].startswith('healthlake-mcp')
+
+
+def test_mutation_check_read_only(monkeypatch):
+    """Test that read-only mode, read from the environment, blocks mutations."""
+    mutation_check()
+
+    monkeypatch.setenv('HEALTHLAKE_MCP_READONLY', 'true')
+    _reload_config()
+    with pytest.raises(Exception, match='read-only mode'):
+        mutation_check()
+
+
+async def test_concurrent_fhir_endpoint_lookups_are_coalesced(mock_healthlake_client):
+    """Test that concurrent cold-cache calls for one datastore share a single describe call."""
+    with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
+
+        def slow_describe(**kwargs):
+            time.sleep(0.05)
+            return {
                 'DatastoreProperties': {
-                    'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/test-id/r4/'
+                    'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/'
                 }
             }
 
-            # Mock the FHIR request
-            mock_fhir_request.return_value = {
-                'resourceType': 'CapabilityStatement',
-                'status': 'active',
-            }
+        mock_healthlake_client.describe_fhir_datastore.side_effect = slow_describe
+        mock_fhir_request.return_value = {'resourceType': 'Patient'}
 
-            result = get_datastore_capabilities(datastore_id='test-datastore-id')
+        await asyncio.gather(
+            *(
+                read_fhir_resource(datastore_id='123', resource_type='Patient', resource_id=str(i))
+                for i in range(5)
+            )
+        )
 
-            assert result['resourceType'] == 'CapabilityStatement'
-            assert result['status'] == 'active'
-            mock_fhir_request.assert_called_once()
+        mock_healthlake_client.describe_fhir_datastore.assert_called_once_with(DatastoreId='123')
+        assert mock_fhir_request.call_count == 5
 
 
-@mock_aws
-def test_list_datastores(aws_credentials):
-    """Test listing datastores."""
-    with patch('boto3.client') as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.list_fhir_datastores.return_value = {'DatastorePropertiesList': []}
-        mock_client.return_value = mock_client_instance
+async def test_datastore_capabilities_are_cached(mock_healthlake_client):
+    """Test that the CapabilityStatement is fetched once and then served from the cache."""
+    with patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request:
+        mock_fhir_request.return_value = {'resourceType': 'CapabilityStatement'}
 
-        result = list_datastores()
+        first = await get_datastore_capabilities(datastore_id='123')
+        first['status'] = 'changed'
+        second = await get_datastore_capabilities(datastore_id='123')
 
-        mock_client.assert_called_once()
-        mock_client_instance.list_fhir_datastores.assert_called_once_with()
-        assert result == {'DatastorePropertiesList': []}
+        assert second == {'resourceType': 'CapabilityStatement'}
+        mock_fhir_request.assert_called_once()
+
+
+def test_validate_fhir_resource_required_and_recommended_fields():
+    """Test the per-resource-type required and recommended field checks."""
+    result = validate_fhir_resource({'resourceType': 'Observation', 'status': 'final'})
+    assert result['valid'] is False
+    assert result['issues'] == ["Missing required field: 'code'"]
 
+    result = validate_fhir_resource({'resourceType': 'Condition', 'subject': {}})
+    assert result == {'valid': True, 'issues': [], 'warnings': []}
 
-def test_read_fhir_resource(aws_credentials):
-    """Test reading a FHIR resource."""
+    result = validate_fhir_resource({'resourceType': 'Encounter', 'status': 'finished'})
+    assert result['valid'] is False
+    assert result['issues'] == ["Missing required field: 'class'"]
+
+    result = validate_fhir_resource({'resourceType': 'Patient', 'id': ''})
+    assert result['warnings'] == ["Patient should have either 'name' or 'identifier' field"]
+    assert result['issues'] == ["Resource 'id' must be 1-64 letters, digits, '-' or '.'"]
+
+    for bad_id in ('has space', 'a' * 65, 'under_score', 42):
+        result = validate_fhir_resource({'resourceType': 'Patient', 'name': [], 'id': bad_id})
+        assert result['issues'] == ["Resource 'id' must be 1-64 letters, digits, '-' or '.'"]
+
+    result = validate_fhir_resource({'resourceType': 'Patient', 'name': [], 'id': 'a-1.B'})
+    assert result['issues'] == []
+
+
+def test_create_observation_template_defaults_effective_datetime():
+    """Test that an Observation template without a datetime is stamped with a UTC instant."""
+    with patch(
+        'awslabs.healthlake_mcp_server.server._fhir_instant', return_value='2024-05-01T12:00:00Z'
+    ):
+        result = create_observation_template(
+            patient_reference='Patient/1',
+            code_system='http://loinc.org',
+            code_value='8867-4',
+            code_display='Heart rate',
+        )
+
+    assert result['effectiveDateTime'] == '2024-05-01T12:00:00Z'
+    assert 'category' not in result
+
+
+async def test_with_region_fills_in_default_region(monkeypatch):
+    """Test that tools get the default region when region_name is omitted or empty."""
+    monkeypatch.setenv('AWS_REGION', 'us-east-2')
+    _reload_config()
+    with patch(
+        'awslabs.healthlake_mcp_server.server._call_healthlake', new_callable=AsyncMock
+    ) as mock_call:
+        mock_call.return_value = {}
+        await describe_datastore('ds-1')
+        await describe_datastore('ds-1', '')
+        await describe_datastore('ds-1', region_name='eu-west-1')
+
+    regions = [call.args[0] for call in mock_call.call_args_list]
+    assert regions == ['us-east-2', 'us-east-2', 'eu-west-1']
+
+
+async def test_search_all_resources_columns():
+    """Test that search results can be returned as one list per requested field."""
+    bundle = {
+        'resourceType': 'Bundle',
+        'total': 2,
+        'link': [{'relation': 'next', 'url': 'https://example.com/next'}],
+        'entry': [
+            {'resource': {'resourceType': 'Patient', 'id': 'p1', 'birthDate': '1980-01-01'}},
+            {'resource': {'resourceType': 'Patient', 'id': 'p2'}},
+        ],
+    }
     with (
-        patch('boto3.client') as mock_client,
-        patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
+        patch(
+            'awslabs.healthlake_mcp_server.server._fhir_endpoint',
+            new_callable=AsyncMock,
+            return_value='https://example.com/r4/',
+        ),
+        patch(
+            'awslabs.healthlake_mcp_server.server._make_fhir_request',
+            new_callable=AsyncMock,
+            return_value=bundle,
+        ),
     ):
-        mock_client_instance = MagicMock()
-        mock_client_instance.describe_fhir_datastore.return_value = {
-            'DatastoreProperties': {
-                'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/'
-            }
-        }
-        mock_client.return_value = mock_client_instance
+        result = await search_all_resources('ds-1', columns=['id', 'birthDate'])
+        del bundle['total']
+        without_total = await search_all_resources('ds-1', columns=['id'])
+
+    assert result == {
+        'total': 2,
+        'link': bundle['link'],
+        'columns': {'id': ['p1', 'p2'], 'birthDate': ['1980-01-01', None]},
+    }
+    # A page's entry count is not the match count, so a missing total stays missing
+    assert without_total['total'] is None
+
+
+async def test_make_fhir_request_revalidates_with_etag():
+    """Test that repeated GETs send If-None-Match and re-parse the cached body on a 304."""
+    url = 'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/Patient/test-id'
+    with (
+        patch('boto3.Session') as mock_session,
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
+    ):
+        mock_session.return_value.get_credentials.return_value = Credentials('AKID', 'SECRET')
+        mock_http_client.request = AsyncMock(
+            side_effect=[
+                httpx.Response(200, json=PATIENT, headers={'ETag': 'W/"1"'}),
+                httpx.Response(304),
+            ]
+        )
 
-        # Mock the FHIR request
-        mock_fhir_request.return_value = {'resourceType': 'Patient', 'id': 'test-id'}
+        first = await _make_fhir_request('GET', url, 'us-west-2')
+        assert first == PATIENT
+        first['id'] = 'changed'
+        assert await _make_fhir_request('GET', url, 'us-west-2') == PATIENT
 
-        result = read_fhir_resource(datastore_id='123', resource_type='Patient', resource_id='456')
+        first, second = mock_http_client.request.call_args_list
+        assert 'If-None-Match' not in first.kwargs['headers']
+        assert second.kwargs['headers']['If-None-Match'] == 'W/"1"'
 
-        mock_client.assert_called_once()
-        mock_client_instance.describe_fhir_datastore.assert_called_once_with(DatastoreId='123')
-        assert result == {'resourceType': 'Patient', 'id': 'test-id'}
 
+async def test_etag_cache_evicts_least_recently_used():
+    """Test that the ETag cache stays within its byte budget, evicting the least recently used."""
+    endpoint = 'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/Patient/'
+    with (
+        patch('boto3.Session') as mock_session,
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
+        patch('awslabs.healthlake_mcp_server.server.ETAG_CACHE_MAX_BYTES', 25),
+    ):
+        mock_session.return_value.get_credentials.return_value = Credentials('AKID', 'SECRET')
+        mock_http_client.request = AsyncMock(
+            side_effect=[
+                httpx.Response(200, content=b'{"id":"a"}', headers={'ETag': '"a"'}),
+                httpx.Response(200, content=b'{"id":"b"}', headers={'ETag': '"b"'}),
+                httpx.Response(304),
+                httpx.Response(200, content=b'{"id":"c"}', headers={'ETag': '"c"'}),
+            ]
+        )
+
+        for resource_id in ['a', 'b', 'a', 'c']:
+            await _make_fhir_request('GET', f'{endpoint}{resource_id}', 'us-west-2')
+
+    # 'a' was revalidated after 'b' was stored, so 'b' is evicted to make room for 'c'
+    assert list(_etag_cache) == [f'{endpoint}a', f'{endpoint}c']
+
+
+async def test_make_fhir_request_resolves_credentials_off_the_loop():
+    """Test that credentials are resolved on a worker thread, not the event loop."""
+    url = 'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/Patient/test-id'
+    threads = []
+
+    def get_credentials():
+        threads.append(threading.current_thread().name)
+        return Credentials('AKID', 'SECRET')
 
-def test_create_fhir_resource(aws_credentials):
-    """Test creating a FHIR resource."""
     with (
-        patch('boto3.client') as mock_client,
-        patch('awslabs.healthlake_mcp_server.server._make_fhir_request') as mock_fhir_request,
+        patch('boto3.Session') as mock_session,
+        patch('awslabs.healthlake_mcp_server.server._http_client') as mock_http_client,
     ):
-        mock_client_instance = MagicMock()
-        mock_client_instance.describe_fhir_datastore.return_value = {
-            'DatastoreProperties': {
-                'DatastoreEndpoint': 'https://healthlake.us-west-2.amazonaws.com/datastore/123/r4/'
-            }
-        }
-        mock_client.return_value = mock_client_instance
+        mock_session.return_value.get_credentials.side_effect = get_credentials
+        mock_http_client.request = AsyncMock(return_value=httpx.Response(200, json=PATIENT))
 
-        # Mock the FHIR request
-        mock_fhir_request.return_value = {'resourceType': 'Patient', 'id': 'created-id'}
+        assert await _make_fhir_request('GET', url, 'us-west-2') == PATIENT
 
-        resource_data = {'resourceType': 'Patient', 'name': [{'family': 'Doe', 'given': ['John']}]}
+    assert len(threads) == 1
+    assert threads[0].startswith('healthlake-mcp')
 
-        result = create_fhir_resource(
-            datastore_id='123', resource_type='Patient', resource_data=resource_data
-        )
 
-        mock_client.assert_called_once()
-        mock_client_instance.describe_fhir_datastore.assert_called_once_with(DatastoreId='123')
-        assert result == {'resourceType': 'Patient', 'id': 'created-id'}
+def test_tags_to_aws():
+    """Test converting tags to the AWS Key/Value format."""
+    assert tags_to_aws([{'Key': 'env', 'Value': 'dev'}, {'key': 'team', 'value': 'fhir'}]) == [
+        {'Key': 'env', 'Value': 'dev'},
+        {'Key': 'team', 'Value': 'fhir'},
+    ]
+
+    with pytest.raises(ValueError, match='expected Key and Value'):
+        tags_to_aws([{'Key': 'env'}])